@@ -30,7 +30,6 @@ class ClientMailHistoryAPIView(APIView):
                 "id": log.id,
                 "mail_type": log.mail_type.name,
                 "subject": log.subject,
-                "body": log.body,
                 "sent_at": log.sent_at,
                 "status": log.status,
             }
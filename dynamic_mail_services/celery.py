@@ -1,10 +1,22 @@
 import os
+import tempfile
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dynamic_mail_services.settings')
 
+# Worker metrics exporter: prefork pool processes write their samples to
+# files the exporter of the main process adds up (prometheus_client
+# multiprocess mode), which must be set before prometheus_client is imported
+WORKER_METRICS_PORT = int(os.environ.get('WORKER_METRICS_PORT', 0))
+if WORKER_METRICS_PORT:
+    os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR',
+        os.path.join(tempfile.gettempdir(), 'prometheus-celery'),
+    )
+
 app = Celery('dynamic_mail_services')
 
 # Using a string here means the worker doesn't have to serialize
@@ -17,6 +29,22 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    if WORKER_METRICS_PORT:
+        from mailings.services.metrics import start_worker_exporter
+
+        start_worker_exporter(WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if WORKER_METRICS_PORT:
+        from mailings.services.metrics import mark_process_dead
+
+        mark_process_dead(pid or os.getpid())
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -0,0 +1,53 @@
+import hmac
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from mailings.services.metrics import HTTP_REQUEST_SECONDS, metrics_registry
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (aggregated over every gunicorn worker).
+    Requires the METRICS_AUTH_TOKEN bearer token; without one configured
+    it serves nothing, unless METRICS_PUBLIC opts in (local development).
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        if not settings.METRICS_PUBLIC:
+            return HttpResponse("Metrics are disabled: set METRICS_AUTH_TOKEN.", status=403, content_type="text/plain")
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def observe_request(request, response, started):
+    match = request.resolver_match
+    # The URL pattern, not the path: keeps label cardinality bounded
+    route = match.route if match is not None else "unmatched"
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=route,
+        status=response.status_code,
+    ).observe(time.perf_counter() - started)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            observe_request(request, response, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            observe_request(request, response, started)
+            return response
+    return middleware
@@ -63,6 +63,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'dynamic_mail_services.metrics.metrics_middleware',  # times the whole stack
     'corsheaders.middleware.CorsMiddleware',  # add at the top
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -92,6 +93,9 @@ TEMPLATES = [
     },
 ]
 
+# Compiled EmailTemplate.template_content kept per process (templates/template_cache.py)
+TEMPLATE_CACHE_MAX_ENTRIES = int(os.environ.get('TEMPLATE_CACHE_MAX_ENTRIES', 128))
+
 WSGI_APPLICATION = 'dynamic_mail_services.wsgi.application'
 
 import dj_database_url
@@ -171,10 +175,52 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 
+# SMTP connection pool (per worker process) used by the bulk sender
+EMAIL_POOL_MAX_CONNECTIONS = int(os.environ.get('EMAIL_POOL_MAX_CONNECTIONS', 2))
+EMAIL_POOL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('EMAIL_POOL_MAX_MESSAGES_PER_CONNECTION', 100))
+EMAIL_POOL_KEEPALIVE_SECONDS = int(os.environ.get('EMAIL_POOL_KEEPALIVE_SECONDS', 30))
+EMAIL_POOL_MAX_IDLE_SECONDS = int(os.environ.get('EMAIL_POOL_MAX_IDLE_SECONDS', 240))
+EMAIL_SEND_BATCH_SIZE = int(os.environ.get('EMAIL_SEND_BATCH_SIZE', 50))
+# Opt-in: above 1, recipients with an identical rendered body share one SMTP
+# transaction (RCPT TO per recipient, one DATA). Those messages list nobody:
+# they go out with "To: undisclosed-recipients:;" and the recipients in the
+# envelope only (as Bcc), which some spam filters and mail clients treat
+# differently. 1 (default) sends one message per recipient, addressed To it.
+EMAIL_MAX_RCPT_PER_TRANSACTION = int(os.environ.get('EMAIL_MAX_RCPT_PER_TRANSACTION', 1))
+# Async delivery engine: concurrent SMTP sessions per worker process, and
+# rendered messages allowed to wait for a free session
+EMAIL_ASYNC_CONCURRENCY = int(os.environ.get('EMAIL_ASYNC_CONCURRENCY', 10))
+EMAIL_ASYNC_QUEUE_SIZE = int(os.environ.get('EMAIL_ASYNC_QUEUE_SIZE', 100))
+# SMTP relays (SMTPRelay rows): how often workers re-read the table, and
+# how fast the latency/error-rate health averages follow new samples
+SMTP_RELAY_REFRESH_SECONDS = int(os.environ.get('SMTP_RELAY_REFRESH_SECONDS', 30))
+SMTP_RELAY_HEALTH_ALPHA = float(os.environ.get('SMTP_RELAY_HEALTH_ALPHA', 0.2))
+# Shared (Redis) send caps of the SMTP relay host, 0 = no cap.
+# Per-sender caps live on the SenderEmail rows.
+EMAIL_RELAY_RATE_LIMIT_PER_MINUTE = int(os.environ.get('EMAIL_RELAY_RATE_LIMIT_PER_MINUTE', 0))
+EMAIL_RELAY_RATE_LIMIT_PER_DAY = int(os.environ.get('EMAIL_RELAY_RATE_LIMIT_PER_DAY', 0))
+# Rendered bodies kept per campaign run for recipients with the same context
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Buffered MailLog outcomes written per bulk_update by the send loop
+MAIL_LOG_FLUSH_SIZE = int(os.environ.get('MAIL_LOG_FLUSH_SIZE', 200))
+# Campaigns whose encoded attachments/inline images are kept per worker process
+MIME_CACHE_MAX_CAMPAIGNS = int(os.environ.get('MIME_CACHE_MAX_CAMPAIGNS', 4))
+
 # 2. MEDIA_ROOT 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') 
 MEDIA_URL = '/media/'
 
+# Inline image bytes cached by (public_id, version): per-process memory tier
+# and a disk tier shared by the workers of one host
+INLINE_IMAGE_CACHE_DIR = os.environ.get('INLINE_IMAGE_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'inline_images'))
+INLINE_IMAGE_CACHE_MEMORY_BYTES = int(os.environ.get('INLINE_IMAGE_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+INLINE_IMAGE_CACHE_DISK_BYTES = int(os.environ.get('INLINE_IMAGE_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+# Cache misses are downloaded concurrently over one keep-alive session
+INLINE_IMAGE_FETCH_WORKERS = int(os.environ.get('INLINE_IMAGE_FETCH_WORKERS', 4))
+INLINE_IMAGE_FETCH_RETRIES = int(os.environ.get('INLINE_IMAGE_FETCH_RETRIES', 2))
+INLINE_IMAGE_FETCH_BACKOFF_SECONDS = float(os.environ.get('INLINE_IMAGE_FETCH_BACKOFF_SECONDS', 0.5))
+INLINE_IMAGE_FETCH_TIMEOUT_SECONDS = int(os.environ.get('INLINE_IMAGE_FETCH_TIMEOUT_SECONDS', 10))
+
 
 
 # settings.py
@@ -193,6 +239,67 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Recipients per send_bulk_mails subtask when a campaign is fanned out
+BULK_MAIL_CHUNK_SIZE = int(os.environ.get('BULK_MAIL_CHUNK_SIZE', 500))
+# PENDING MailLog rows a worker claims at a time, and how long a claim is
+# held before another worker may take the rows over (crashed worker)
+BULK_MAIL_CLAIM_SIZE = int(os.environ.get('BULK_MAIL_CLAIM_SIZE', 100))
+BULK_MAIL_CLAIM_LEASE_SECONDS = int(os.environ.get('BULK_MAIL_CLAIM_LEASE_SECONDS', 900))
+# A worker with nothing left to claim while other runs still hold rows
+# checks back this often (until the rows are done or their lease expires)
+BULK_MAIL_CLAIM_POLL_SECONDS = int(os.environ.get('BULK_MAIL_CLAIM_POLL_SECONDS', 30))
+# Per-recipient retry of transient SMTP errors (4xx, dropped connections)
+BULK_MAIL_MAX_ATTEMPTS = int(os.environ.get('BULK_MAIL_MAX_ATTEMPTS', 4))
+BULK_MAIL_RETRY_BACKOFF_SECONDS = int(os.environ.get('BULK_MAIL_RETRY_BACKOFF_SECONDS', 60))
+BULK_MAIL_RETRY_BACKOFF_MAX_SECONDS = int(os.environ.get('BULK_MAIL_RETRY_BACKOFF_MAX_SECONDS', 3600))
+
+# Attachment store GC: unreferenced blobs untouched for the grace period are
+# deleted every ATTACHMENT_GC_INTERVAL_SECONDS (requires celery beat)
+ATTACHMENT_GC_GRACE_SECONDS = int(os.environ.get('ATTACHMENT_GC_GRACE_SECONDS', 3600))
+ATTACHMENT_GC_INTERVAL_SECONDS = int(os.environ.get('ATTACHMENT_GC_INTERVAL_SECONDS', 900))
+# Attachment uploads: bytes allowed per file and per campaign (all files of
+# one bulk send); bigger uploads are refused with 413 while they stream in
+ATTACHMENT_MAX_FILE_BYTES = int(os.environ.get('ATTACHMENT_MAX_FILE_BYTES', 10 * 1024 * 1024))
+ATTACHMENT_MAX_CAMPAIGN_BYTES = int(os.environ.get('ATTACHMENT_MAX_CAMPAIGN_BYTES', 20 * 1024 * 1024))
+# Attachment janitor: campaigns no worker started within the first delay are
+# expired (recipients failed, attachments released); stray files (interrupted
+# uploads, legacy temp_emails) older than the second one are deleted
+ATTACHMENT_ORPHAN_CAMPAIGN_SECONDS = int(os.environ.get('ATTACHMENT_ORPHAN_CAMPAIGN_SECONDS', 3 * 24 * 3600))
+ATTACHMENT_ORPHAN_FILE_SECONDS = int(os.environ.get('ATTACHMENT_ORPHAN_FILE_SECONDS', 24 * 3600))
+# A SENDING campaign whose counters have not moved for this long is expired
+# the same way (its workers are gone). Keep it well above the claim lease
+# and the longest retry backoff, during which a live campaign is idle.
+CAMPAIGN_STALL_SECONDS = int(os.environ.get('CAMPAIGN_STALL_SECONDS', 6 * 3600))
+ATTACHMENT_JANITOR_INTERVAL_SECONDS = int(os.environ.get('ATTACHMENT_JANITOR_INTERVAL_SECONDS', 3600))
+
+CELERY_BEAT_SCHEDULE = {
+    'collect-attachment-blobs': {
+        'task': 'mailings.services.attachment_store.collect_attachment_blobs',
+        'schedule': ATTACHMENT_GC_INTERVAL_SECONDS,
+    },
+    'reclaim-orphaned-attachments': {
+        'task': 'mailings.services.attachment_janitor.reclaim_orphaned_attachments',
+        'schedule': ATTACHMENT_JANITOR_INTERVAL_SECONDS,
+    },
+}
+
+# Campaign progress events (Redis pub/sub -> server-sent events): at most one
+# event per campaign and worker process per interval, and a keepalive comment
+# on idle streams so proxies do not close them
+CAMPAIGN_EVENTS_PUBLISH_INTERVAL_SECONDS = float(os.environ.get('CAMPAIGN_EVENTS_PUBLISH_INTERVAL_SECONDS', 1.0))
+CAMPAIGN_EVENTS_KEEPALIVE_SECONDS = int(os.environ.get('CAMPAIGN_EVENTS_KEEPALIVE_SECONDS', 15))
+# Lifetime of the campaign-scoped token that opens a progress stream from
+# a browser (?token=); clients fetch a new one to reconnect after it
+CAMPAIGN_EVENTS_TOKEN_SECONDS = int(os.environ.get('CAMPAIGN_EVENTS_TOKEN_SECONDS', 300))
+
+# Prometheus: /metrics requires "Authorization: Bearer <token>"; without a
+# token it is disabled (403), unless METRICS_PUBLIC=true serves it to anyone
+# (local development only: labels include sender addresses). Broker queues
+# (Redis lists) are reported as mail_queue_depth
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN', '')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False').lower() == 'true'
+METRICS_CELERY_QUEUES = os.environ.get('METRICS_CELERY_QUEUES', 'celery').split(',')
+
 
 
 # cloudinary setup : 
@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from .test import test_send_email
+from .metrics import metrics_view
 
 from django.conf import settings
 from django.conf.urls.static import static
@@ -13,6 +14,9 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/mailings/',include('mailings.urls')),
     path('api/templates/',include('templates.urls')),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
     
     # Testing the mail 
     path('api/send-mail-test/',view=test_send_email,name='testing'),
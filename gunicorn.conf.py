@@ -0,0 +1,26 @@
+# Loaded by gunicorn from the working directory (render.yml startCommand).
+import os
+import tempfile
+
+# prometheus_client multiprocess mode: each of the WEB_CONCURRENCY workers
+# writes its samples to files in this directory and /metrics adds them up.
+# Must be set before a worker imports prometheus_client.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "prometheus-web"),
+)
+
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be added to this one's
+    import shutil
+
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
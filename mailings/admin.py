@@ -1,14 +1,73 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import SenderEmail, MailLog
+from .models import SenderEmail, SMTPRelay, AttachmentBlob, Campaign, MailLog
 
 @admin.register(SenderEmail)
 class SenderEmailAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email')
+    list_display = ('name', 'email', 'rate_limit_per_minute', 'rate_limit_per_day')
     search_fields = ('name', 'email')  # Added name to search as well
     ordering = ('name',) # Explicit ordering is good practice
 
 
+class SMTPRelayForm(forms.ModelForm):
+    # Never sent back to the browser; left blank, the stored password is kept
+    password = forms.CharField(
+        required=False,
+        widget=forms.PasswordInput(render_value=False),
+        help_text="Leave blank to keep the current password; cleared when password env is set.",
+    )
+
+    class Meta:
+        model = SMTPRelay
+        fields = '__all__'
+
+    def clean_password(self):
+        password = self.cleaned_data.get('password')
+        if not password and self.instance.pk:
+            return self.instance.password
+        return password
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('password_env'):
+            # The secret comes from the environment: drop the stored copy
+            cleaned_data['password'] = ''
+        return cleaned_data
+
+
+@admin.register(SMTPRelay)
+class SMTPRelayAdmin(admin.ModelAdmin):
+    form = SMTPRelayForm
+    list_display = ('name', 'host', 'port', 'weight', 'max_connections', 'is_active')
+    list_editable = ('weight', 'max_connections', 'is_active')
+    search_fields = ('name', 'host')
+    ordering = ('name',)
+
+
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at', 'last_used_at')
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'size', 'ref_count', 'created_at', 'last_used_at')
+    ordering = ('-last_used_at',)
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'task_id', 'mail_type', 'sender', 'status',
+        'total_count', 'sent_count', 'failed_count', 'pending_count', 'created_at'
+    )
+    list_filter = ('status', 'mail_type', 'delivery_engine')
+    search_fields = ('name', 'task_id', 'subject')
+    readonly_fields = (
+        'task_id', 'status', 'total_count', 'sent_count', 'failed_count', 'pending_count',
+        'created_at', 'started_at', 'last_progress_at', 'finished_at'
+    )
+    ordering = ('-created_at',)
+
+
 @admin.register(MailLog)
 class MailLogAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,255 @@
+# mailings/benchmark/dataset.py
+
+import random
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from client.models import Client
+from templates.models import MailType, EmailTemplate
+from users.models import User
+from mailings.models import Campaign, MailLog, SenderEmail
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_TEMPLATE = """<html><body>
+<p>Hello {{ client_name }},</p>
+<p>{{ message }}</p>
+<p>{{ company_name }} - {{ sender_name }} ({{ sender_email }})</p>
+</body></html>"""
+
+# Error messages of FAILED rows, as the send path records them
+FAILURE_MESSAGES = [
+    "(550, b'5.1.1 Mailbox unavailable')",
+    "(552, b'5.2.2 Mailbox full')",
+    "(554, b'5.7.1 Message rejected as spam')",
+    "(451, b'4.3.0 Try again later') - retries exhausted",
+    "Connection unexpectedly closed",
+]
+
+
+def create_clients(prefix, start, count, password, company_name, batch_size=5000, is_active=None):
+    """
+    Bulk insert `count` users with their Client rows, numbered from
+    `start`, and return the client ids. `password` is an already hashed
+    password shared by all of them: hashing is what makes one-by-one
+    registration slow. company_name(i) and is_active(i) give the values
+    of client i.
+    """
+    client_ids = []
+    for batch_start in range(start, start + count, batch_size):
+        batch = range(batch_start, min(batch_start + batch_size, start + count))
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{prefix}-{i}",
+                    email=f"{prefix}-{i}@synthetic.invalid",
+                    password=password,
+                    role="CLIENT",
+                )
+                for i in batch
+            ])
+            clients = Client.objects.bulk_create([
+                Client(
+                    user=user,
+                    company_name=company_name(i),
+                    contact_email=user.email,
+                    is_active=is_active(i) if is_active else True,
+                )
+                for i, user in zip(batch, users)
+            ])
+        client_ids.extend(client.id for client in clients)
+    return client_ids
+
+
+class SyntheticDataset:
+    """
+    Load test data: clients, mail types with their templates, senders and
+    months of finished campaigns with their MailLog rows. Every row is
+    tagged with `prefix` (usernames, emails, names), so delete() removes
+    exactly one dataset and nothing else.
+
+    Distributions:
+    - campaign sizes are log-normal around `campaign_size` (most campaigns
+      are small, a few reach a large share of the clients)
+    - campaigns are spread over the last `days` days, on office hours
+    - each recipient row is SENT, FAILED or PENDING with `status_weights`
+    """
+
+    def __init__(self, prefix="synthetic", password="synthetic-password", seed=0, batch_size=5000):
+        self.prefix = prefix
+        self.password = password
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.admin = None
+        self.mail_types = []
+        self.senders = []
+
+    @classmethod
+    def load(cls, prefix, **kwargs):
+        """The dataset an earlier run created with `prefix`."""
+        dataset = cls(prefix=prefix, **kwargs)
+        dataset.admin = User.objects.filter(username=f"{prefix}-admin").first()
+        dataset.mail_types = list(
+            MailType.objects.filter(name__startswith=f"{prefix}-type-").select_related("template").order_by("id")
+        )
+        dataset.senders = list(SenderEmail.objects.filter(email__startswith=f"{prefix}-sender-").order_by("id"))
+        if dataset.admin is None or not dataset.mail_types or not dataset.senders:
+            return None
+        return dataset
+
+    # --- reference data ---
+
+    def create_reference_data(self, mail_types=20, senders=5):
+        self.admin, _ = User.objects.get_or_create(
+            username=f"{self.prefix}-admin",
+            defaults={
+                "email": f"{self.prefix}-admin@synthetic.invalid",
+                "password": make_password(self.password),
+                "role": "ADMIN",
+                "is_staff": True,
+            },
+        )
+        for i in range(mail_types):
+            mail_type, created = MailType.objects.get_or_create(name=f"{self.prefix}-type-{i}"[:50])
+            if created:
+                EmailTemplate.objects.create(
+                    mail_type=mail_type,
+                    subject=f"{self.prefix} newsletter {i}",
+                    template_name=f"{self.prefix}-template-{i}",
+                    template_content=SYNTHETIC_TEMPLATE,
+                    available_variables="client_name,company_name,message,sender_name,sender_email",
+                )
+            self.mail_types.append(mail_type)
+        self.mail_types = list(MailType.objects.filter(id__in=[m.id for m in self.mail_types]).select_related("template"))
+        for i in range(senders):
+            sender, _ = SenderEmail.objects.get_or_create(
+                email=f"{self.prefix}-sender-{i}@synthetic.invalid",
+                defaults={"name": f"Synthetic sender {i}"},
+            )
+            self.senders.append(sender)
+
+    # --- clients ---
+
+    def existing_clients(self):
+        return Client.objects.filter(contact_email__startswith=f"{self.prefix}-")
+
+    def create_clients(self, count, companies=None, inactive_rate=0.03):
+        """Add `count` clients after the existing ones of this dataset."""
+        start = self.existing_clients().count()
+        companies = companies or max(count // 20, 1)
+        # Hashing once: one PBKDF2 round trip per user would dominate the run
+        password = make_password(self.password)
+        rng = self.random
+        return create_clients(
+            self.prefix,
+            start,
+            count,
+            password,
+            company_name=lambda i: f"Company {rng.randrange(companies)}",
+            is_active=lambda i: rng.random() >= inactive_rate,
+            batch_size=self.batch_size,
+        )
+
+    # --- history ---
+
+    def campaign_sizes(self, total_logs, median_size, max_size):
+        """Log-normal campaign sizes adding up to total_logs."""
+        sizes = []
+        remaining = total_logs
+        while remaining > 0:
+            size = int(self.random.lognormvariate(0, 1.2) * median_size)
+            size = max(1, min(size, max_size, remaining))
+            sizes.append(size)
+            remaining -= size
+        return sizes
+
+    def campaign_time(self, now, days):
+        day = now - timedelta(days=self.random.uniform(0, days))
+        return day.replace(hour=self.random.randint(8, 17), minute=self.random.randrange(60))
+
+    def create_history(self, client_ids, total_logs, days=180, campaign_size=500,
+                       status_weights=(0.95, 0.04, 0.01), progress=None):
+        """
+        Finished campaigns with `total_logs` MailLog rows in all, to
+        random recipients among `client_ids`. progress(logs_so_far) is
+        called after each campaign.
+        """
+        now = timezone.now()
+        statuses = [MailLog.StatusChoices.SENT, MailLog.StatusChoices.FAILED, MailLog.StatusChoices.PENDING]
+        max_attempts = settings.BULK_MAIL_MAX_ATTEMPTS
+        created = 0
+
+        for number, size in enumerate(self.campaign_sizes(total_logs, campaign_size, len(client_ids))):
+            mail_type = self.random.choice(self.mail_types)
+            sender = self.random.choice(self.senders)
+            sent_at = self.campaign_time(now, days)
+            recipients = self.random.sample(client_ids, size)
+            row_statuses = self.random.choices(statuses, weights=status_weights, k=size)
+            counts = {status: row_statuses.count(status) for status in statuses}
+
+            with transaction.atomic():
+                campaign = Campaign.objects.create(
+                    name=f"{self.prefix} {sent_at:%Y-%m-%d} #{number}",
+                    mail_type=mail_type,
+                    template=mail_type.template,
+                    sender=sender,
+                    created_by=self.admin,
+                    subject=mail_type.template.subject,
+                    status=Campaign.StatusChoices.SENDING if counts[statuses[2]] else Campaign.StatusChoices.FINISHED,
+                    total_count=size,
+                    sent_count=counts[statuses[0]],
+                    failed_count=counts[statuses[1]],
+                    pending_count=counts[statuses[2]],
+                )
+                for start in range(0, size, self.batch_size):
+                    MailLog.objects.bulk_create([
+                        MailLog(
+                            client_id=client_id,
+                            mail_type=mail_type,
+                            template_used=mail_type.template,
+                            sender_email=sender,
+                            created_by=self.admin,
+                            task_id=campaign.task_id,
+                            campaign=campaign,
+                            campaign_name=campaign.name,
+                            status=status,
+                            subject=campaign.subject,
+                            error_message=self.random.choice(FAILURE_MESSAGES) if status == statuses[1] else None,
+                            claimed_at=None if status == statuses[2] else sent_at,
+                            attempts=max_attempts if status == statuses[1] else int(status == statuses[0]),
+                        )
+                        for client_id, status in zip(
+                            recipients[start:start + self.batch_size],
+                            row_statuses[start:start + self.batch_size],
+                        )
+                    ])
+                # auto_now_add stamps "now" on insert: move the campaign back in time
+                MailLog.objects.filter(campaign=campaign).update(sent_at=sent_at)
+                finished_at = sent_at + timedelta(seconds=size / 50)
+                Campaign.objects.filter(id=campaign.id).update(
+                    created_at=sent_at,
+                    started_at=sent_at,
+                    last_progress_at=finished_at,
+                    finished_at=None if counts[statuses[2]] else finished_at,
+                )
+
+            created += size
+            if progress:
+                progress(created)
+        return created
+
+    # --- cleanup ---
+
+    def delete(self):
+        campaigns = Campaign.objects.filter(name__startswith=f"{self.prefix} ")
+        MailLog.objects.filter(campaign__in=campaigns).delete()
+        campaigns.delete()
+        Client.objects.filter(contact_email__startswith=f"{self.prefix}-").delete()
+        User.objects.filter(username__startswith=f"{self.prefix}-").delete()
+        SenderEmail.objects.filter(email__startswith=f"{self.prefix}-sender-").delete()
+        MailType.objects.filter(name__startswith=f"{self.prefix}-type-").delete()
@@ -0,0 +1,222 @@
+# mailings/benchmark/loadtest.py
+
+import json
+import random
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client as HttpClient
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from client.models import Client
+from mailings.models import Campaign, MailLog
+from mailings.benchmark.runner import QueryCounter, percentiles_ms
+
+logger = logging.getLogger(__name__)
+
+# Most SQL queries one request of each endpoint may run. The counts do not
+# depend on the page size or the data volume; an N+1 (a serializer field
+# reaching through a relation that is not select_related) breaks them at
+# the first page.
+QUERY_BUDGETS = {
+    "mail_logs": 3,                 # user, count, page
+    "mail_logs_filtered": 4,        # + the mail_type filter's choice lookup
+    "mail_log_detail": 2,           # user, log with relations
+    "campaign_detail": 2,           # user, campaign
+    "email_preview": 5,             # user, client, mail type with template, sender, images
+    "mail_types": 3,                # user, count, page with templates
+    "email_templates": 3,
+    "client_mail_history": 3,       # user, client, logs with mail types
+}
+
+# One request: method, path, JSON body (or None) and the user it runs as
+Request = namedtuple("Request", ["method", "path", "data", "user"])
+
+
+class Endpoint:
+    """
+    An endpoint under test: `make_request(rng)` returns the Request to
+    send, picking its ids (and user) from the dataset, so concurrent
+    requests do not all hit the same rows.
+    """
+
+    def __init__(self, name, make_request, budget):
+        self.name = name
+        self.make_request = make_request
+        self.budget = budget
+
+
+def dataset_endpoints(dataset, budgets=None, sample_size=200):
+    """The endpoints under test, with ids sampled from the synthetic dataset."""
+    budgets = {**QUERY_BUDGETS, **(budgets or {})}
+
+    admin = dataset.admin
+    campaigns = list(
+        Campaign.objects.filter(name__startswith=f"{dataset.prefix} ")
+        .values_list("id", flat=True)[:sample_size]
+    )
+    logs = list(
+        MailLog.objects.filter(campaign_id__in=campaigns)
+        .values_list("id", flat=True)[:sample_size]
+    )
+    clients = list(
+        Client.objects.filter(id__in=MailLog.objects.filter(id__in=logs).values("client_id"))
+        .select_related("user")
+    )
+    if not (campaigns and logs and clients):
+        raise ValueError(f"Dataset '{dataset.prefix}' has no campaigns, logs or clients with mail")
+
+    mail_type = dataset.mail_types[0]
+    sender = dataset.senders[0]
+
+    def get(path, user=admin):
+        return lambda rng: Request("GET", path(rng) if callable(path) else path, None, user)
+
+    endpoints = [
+        Endpoint("mail_logs", get("/api/mailings/logs/?page_size=100"), budgets["mail_logs"]),
+        Endpoint(
+            "mail_logs_filtered",
+            get(f"/api/mailings/logs/?status=FAILED&mail_type={mail_type.id}&search=Company"),
+            budgets["mail_logs_filtered"],
+        ),
+        Endpoint(
+            "mail_log_detail",
+            get(lambda rng: f"/api/mailings/logs/{rng.choice(logs)}/"),
+            budgets["mail_log_detail"],
+        ),
+        Endpoint(
+            "campaign_detail",
+            get(lambda rng: f"/api/mailings/campaigns/{rng.choice(campaigns)}/"),
+            budgets["campaign_detail"],
+        ),
+        Endpoint(
+            "email_preview",
+            lambda rng: Request("POST", "/api/mailings/preview/", {
+                "client_id": rng.choice(clients).id,
+                "mail_type_id": mail_type.id,
+                "sender_id": sender.id,
+                "message": "Load test preview",
+            }, admin),
+            budgets["email_preview"],
+        ),
+        Endpoint("mail_types", get("/api/templates/types/?page_size=100"), budgets["mail_types"]),
+        Endpoint("email_templates", get("/api/templates/templates/?page_size=100"), budgets["email_templates"]),
+        Endpoint(
+            "client_mail_history",
+            lambda rng: Request("GET", "/api/mail-history/", None, rng.choice(clients).user),
+            budgets["client_mail_history"],
+        ),
+    ]
+    return endpoints
+
+
+class EndpointResult:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.latencies = []
+        self.max_queries = 0
+        self.max_queries_path = None
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, request, status_code, seconds, queries):
+        with self.lock:
+            self.latencies.append(seconds)
+            if queries > self.max_queries:
+                self.max_queries = queries
+                self.max_queries_path = request.path
+            if status_code >= 400:
+                self.errors[status_code] = self.errors.get(status_code, 0) + 1
+
+    @property
+    def over_budget(self):
+        return self.max_queries > self.endpoint.budget
+
+    def to_dict(self, elapsed):
+        return {
+            "requests": len(self.latencies),
+            "requests_per_second": round(len(self.latencies) / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": percentiles_ms(self.latencies),
+            "max_queries": self.max_queries,
+            "query_budget": self.endpoint.budget,
+            "over_budget": self.over_budget,
+            "max_queries_path": self.max_queries_path,
+            "errors": {str(code): count for code, count in self.errors.items()},
+        }
+
+
+class LoadTest:
+    """
+    Drives endpoints in-process (Django's test client, the full middleware
+    and DRF stack, no network) from `concurrency` threads, each with its
+    own database connection, and records per request latency and SQL query
+    count.
+    """
+
+    def __init__(self, endpoints, concurrency=4, requests=100, seed=0):
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.requests = requests
+        self.seed = seed
+        self._tokens = {}
+        self._tokens_lock = threading.Lock()
+
+    def token(self, user):
+        with self._tokens_lock:
+            token = self._tokens.get(user.pk)
+            if token is None:
+                token = self._tokens[user.pk] = str(AccessToken.for_user(user))
+            return token
+
+    def send(self, http, request):
+        headers = {"Authorization": f"Bearer {self.token(request.user)}"}
+        if request.method == "POST":
+            return http.post(request.path, json.dumps(request.data), content_type="application/json", headers=headers)
+        return http.get(request.path, headers=headers)
+
+    def worker(self, endpoint, result, count, seed):
+        http = HttpClient(raise_request_exception=False)
+        rng = random.Random(seed)
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                for _ in range(count):
+                    request = endpoint.make_request(rng)
+                    counter.count = 0
+                    started = perf_counter()
+                    response = self.send(http, request)
+                    result.record(request, response.status_code, perf_counter() - started, counter.count)
+        finally:
+            connection.close()
+
+    def run_endpoint(self, endpoint):
+        result = EndpointResult(endpoint)
+        per_worker, extra = divmod(self.requests, self.concurrency)
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [
+                pool.submit(self.worker, endpoint, result, per_worker + (i < extra), self.seed + i)
+                for i in range(self.concurrency)
+            ]
+            for future in futures:
+                future.result()
+        return result, perf_counter() - started
+
+    def run(self):
+        report = {}
+        # The test client's host must pass ALLOWED_HOSTS
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for endpoint in self.endpoints:
+                # One warm-up request: first-hit costs (template compilation, caches) are not load
+                self.worker(endpoint, EndpointResult(endpoint), 1, self.seed)
+                result, elapsed = self.run_endpoint(endpoint)
+                report[endpoint.name] = result.to_dict(elapsed)
+                logger.info(f"⏱️ {endpoint.name}: {report[endpoint.name]['latency_ms']} ms, {result.max_queries} queries")
+        return report
+
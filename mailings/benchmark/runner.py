@@ -0,0 +1,215 @@
+# mailings/benchmark/runner.py
+
+import os
+import uuid
+import resource
+import logging
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import override_settings
+
+from client.models import Client
+from templates.models import MailType, EmailTemplate
+from users.models import User
+from mailings.models import Campaign, MailLog, SenderEmail
+from mailings.benchmark.dataset import create_clients
+from mailings.services.relay_router import Relay, RelayRouter, use_relay_router
+from mailings.services.smtp_pool import SMTPConnectionPool
+from mailings.services.stage_profile import StageHistogram, StageProfile
+
+logger = logging.getLogger(__name__)
+
+BENCH_TEMPLATE = """<html><body>
+<p>Dear {{ company_name }} team,</p>
+<p>{{ message }}</p>
+<p>{{ company_name }} - {{ sender_name }} ({{ sender_email }})</p>
+</body></html>"""
+
+
+# --- synthetic data ---
+
+class BenchmarkData:
+    """
+    Synthetic recipients, template and sender of one benchmark run. Every
+    row is tagged with the run prefix, so cleanup() removes exactly them.
+    """
+
+    def __init__(self, prefix=None):
+        self.prefix = prefix or f"bench-{uuid.uuid4().hex[:8]}"
+        self.mail_type = None
+        self.template = None
+        self.sender = None
+
+    def create_fixtures(self):
+        self.mail_type = MailType.objects.create(name=self.prefix[:50])
+        self.template = EmailTemplate.objects.create(
+            mail_type=self.mail_type,
+            subject="Benchmark",
+            template_name=self.prefix,
+            template_content=BENCH_TEMPLATE,
+        )
+        self.sender = SenderEmail.objects.create(name="Benchmark", email=f"{self.prefix}@bench.invalid")
+
+    def create_recipients(self, count, distinct_contexts=0, batch_size=2000):
+        """
+        `count` active clients; with distinct_contexts, their company names
+        repeat every distinct_contexts clients (as in real contact lists,
+        where many recipients render to the same body).
+        """
+        offset = Client.objects.filter(contact_email__startswith=f"{self.prefix}-").count()
+        return create_clients(
+            self.prefix,
+            offset,
+            count,
+            # Unusable password: the benchmark users never log in
+            make_password(None),
+            company_name=lambda i: f"Company {i % distinct_contexts if distinct_contexts else i}",
+            batch_size=batch_size,
+        )
+
+    def cleanup(self):
+        campaigns = Campaign.objects.filter(mail_type__name=self.prefix[:50])
+        MailLog.objects.filter(campaign__in=campaigns).delete()
+        campaigns.delete()
+        Client.objects.filter(contact_email__startswith=f"{self.prefix}-").delete()
+        User.objects.filter(username__startswith=f"{self.prefix}-").delete()
+        SenderEmail.objects.filter(email=f"{self.prefix}@bench.invalid").delete()
+        MailType.objects.filter(name=self.prefix[:50]).delete()
+
+
+# --- measurements ---
+
+class QueryCounter:
+    """connection.execute_wrapper() hook counting queries, without keeping their SQL."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS mark (Linux), so the next peak is this run's."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Lifetime peak of the process: kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def percentiles_ms(seconds):
+    histogram = StageHistogram()
+    for value in seconds:
+        histogram.add(value)
+    return {
+        "p50": round(histogram.quantile(0.50) * 1000, 3),
+        "p95": round(histogram.quantile(0.95) * 1000, 3),
+        "p99": round(histogram.quantile(0.99) * 1000, 3),
+        "max": round(histogram.max * 1000, 3),
+    }
+
+
+# --- runs ---
+
+def sink_router(sink, max_connections):
+    """A relay router that can only send to the benchmark sink."""
+    pool = SMTPConnectionPool(
+        max_connections=max_connections,
+        connection_kwargs={
+            "backend": "django.core.mail.backends.smtp.EmailBackend",
+            "host": sink.host,
+            "port": sink.port,
+            "username": "",
+            "password": "",
+            "use_tls": False,
+            "use_ssl": False,
+        },
+    )
+    relay = Relay(
+        "benchmark-sink", "benchmark-sink", sink.host, 1, pool,
+        async_kwargs={"hostname": sink.host, "port": sink.port, "use_tls": False, "start_tls": False},
+    )
+    return RelayRouter(relays=[relay])
+
+
+def run_campaign(data, client_ids, sink, *, delivery_engine="pool", chunk_size=None, max_connections=2):
+    """
+    Send one campaign to `client_ids` through the real dispatch and task
+    code (eagerly, in this process) and measure it.
+    """
+    from dynamic_mail_services.celery import app
+    from mailings.services.bulk_mail_service import dispatch_bulk_mails
+
+    router = sink_router(sink, max_connections)
+    counter = QueryCounter()
+    eager = app.conf.task_always_eager, app.conf.task_eager_propagates
+    app.conf.task_always_eager = app.conf.task_eager_propagates = True
+    rss_reset = reset_peak_rss()
+    try:
+        # No waiting between retry rounds, no shared rate limits on the sink
+        with override_settings(
+            BULK_MAIL_RETRY_BACKOFF_SECONDS=0,
+            EMAIL_RELAY_RATE_LIMIT_PER_MINUTE=0,
+            EMAIL_RELAY_RATE_LIMIT_PER_DAY=0,
+        ), use_relay_router(router), connection.execute_wrapper(counter):
+            started = perf_counter()
+            result = dispatch_bulk_mails(
+                client_ids=client_ids,
+                mail_type_id=data.mail_type.id,
+                email_template_id=data.template.id,
+                sender_id=data.sender.id,
+                subject="Benchmark",
+                attachments=[],
+                message="This is a benchmark message.",
+                campaign_name=data.prefix,
+                delivery_engine=delivery_engine,
+                chunk_size=chunk_size,
+            )
+            summary = result.get()
+            elapsed = perf_counter() - started
+    finally:
+        app.conf.task_always_eager, app.conf.task_eager_propagates = eager
+        for relay in router.relays():
+            relay.pool.close_all()
+
+    campaign = Campaign.objects.get(task_id=result.id)
+    recipients = summary["sent"] + summary["failed"]
+    return {
+        "recipients": len(client_ids),
+        "delivery_engine": delivery_engine,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(recipients / elapsed, 1) if elapsed else 0.0,
+        "sent": summary["sent"],
+        "failed": summary["failed"],
+        "pending": summary["pending"],
+        "render_dedup_ratio": summary["render_dedup_ratio"],
+        "smtp": {
+            **sink.stats(),
+            "transactions_per_second": round(sink.transactions / elapsed, 1) if elapsed else 0.0,
+            "transaction_latency_ms": percentiles_ms(sink.transaction_seconds),
+        },
+        "db_queries": counter.count,
+        "db_queries_per_1k_recipients": round(counter.count * 1000 / len(client_ids), 1) if client_ids else 0.0,
+        "peak_rss_bytes": peak_rss_bytes(),
+        # False: the peak covers the whole process, not only this run
+        "peak_rss_reset": rss_reset,
+        "stages": StageProfile.from_dict(campaign.timing_profile).summary()["stages"],
+    }
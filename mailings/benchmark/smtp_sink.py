@@ -0,0 +1,172 @@
+# mailings/benchmark/smtp_sink.py
+
+import asyncio
+import random
+import threading
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSink:
+    """
+    Minimal asyncio SMTP server that accepts and discards mail, for
+    benchmarks. It advertises PIPELINING (so the pipelined sendmail path
+    is exercised) and can inject:
+
+    - latency: seconds before the reply to DATA (the relay's queueing time)
+    - connect_latency: seconds before the greeting
+    - fail_rate: share of recipients refused with 451 (transient, retried)
+    - reject_rate: share of recipients refused with 550 (permanent)
+
+    Failures are drawn from a seeded RNG, so runs are reproducible. It
+    runs its own event loop in a background thread: start() returns once
+    it listens, and `port` is the actual port (0 picks a free one).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, *, latency=0.0, connect_latency=0.0,
+                 fail_rate=0.0, reject_rate=0.0, seed=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.fail_rate = fail_rate
+        self.reject_rate = reject_rate
+        self._random = random.Random(seed)
+
+        self.connections = 0
+        self.transactions = 0
+        self.recipients = 0
+        self.refused = 0
+        self.bytes_received = 0
+        # Seconds from MAIL FROM to the final reply of each transaction
+        self.transaction_seconds = []
+
+        self._loop = None
+        self._thread = None
+        self._server = None
+
+    # --- lifecycle ---
+
+    def start(self):
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._session, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info(f"📭 SMTP sink listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "transactions": self.transactions,
+            "recipients": self.recipients,
+            "refused": self.refused,
+            "bytes_received": self.bytes_received,
+        }
+
+    # --- protocol ---
+
+    def _recipient_reply(self):
+        draw = self._random.random()
+        if draw < self.reject_rate:
+            return b"550 5.1.1 Mailbox unavailable (injected)\r\n"
+        if draw < self.reject_rate + self.fail_rate:
+            return b"451 4.3.0 Try again later (injected)\r\n"
+        return None
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        writer.write(b"220 smtp-sink ESMTP\r\n")
+        accepted = 0
+        mail_started = perf_counter()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                verb = line[:4].upper()
+
+                if verb == b"EHLO":
+                    writer.write(b"250-smtp-sink\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+                elif verb == b"HELO":
+                    writer.write(b"250 smtp-sink\r\n")
+                elif verb == b"MAIL":
+                    accepted = 0
+                    mail_started = perf_counter()
+                    writer.write(b"250 2.1.0 Ok\r\n")
+                elif verb == b"RCPT":
+                    reply = self._recipient_reply()
+                    if reply is None:
+                        accepted += 1
+                        self.recipients += 1
+                        writer.write(b"250 2.1.5 Ok\r\n")
+                    else:
+                        self.refused += 1
+                        writer.write(reply)
+                elif verb == b"DATA" and not accepted:
+                    writer.write(b"554 5.5.1 No valid recipients\r\n")
+                elif verb == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b".\r\n":
+                            break
+                        self.bytes_received += len(data)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self.transactions += 1
+                    self.transaction_seconds.append(perf_counter() - mail_started)
+                    writer.write(b"250 2.0.0 Ok: queued\r\n")
+                elif verb == b"RSET":
+                    accepted = 0
+                    writer.write(b"250 2.0.0 Ok\r\n")
+                elif verb == b"NOOP":
+                    writer.write(b"250 2.0.0 Ok\r\n")
+                elif verb == b"QUIT":
+                    writer.write(b"221 2.0.0 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"502 5.5.2 Command not recognized\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,115 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from mailings.benchmark.runner import BenchmarkData, run_campaign
+from mailings.benchmark.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark send_bulk_mails: seed synthetic recipients, send campaigns of "
+        "each size to a local SMTP sink through the real task code, and print "
+        "throughput, latency percentiles, peak RSS and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000",
+                            help="Comma separated campaign sizes (recipients)")
+        parser.add_argument("--engine", choices=["pool", "async"], default="pool",
+                            help="Delivery engine of the campaigns")
+        parser.add_argument("--latency-ms", type=float, default=0.0,
+                            help="Sink delay before accepting each message")
+        parser.add_argument("--connect-latency-ms", type=float, default=0.0,
+                            help="Sink delay before greeting each connection")
+        parser.add_argument("--fail-rate", type=float, default=0.0,
+                            help="Share of recipients refused with 451 (retried)")
+        parser.add_argument("--reject-rate", type=float, default=0.0,
+                            help="Share of recipients refused with 550")
+        parser.add_argument("--distinct-contexts", type=int, default=10,
+                            help="Distinct company names among recipients (0: all distinct)")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Recipients per worker task (default BULK_MAIL_CHUNK_SIZE)")
+        parser.add_argument("--max-connections", type=int, default=2,
+                            help="SMTP sessions of the pool engine")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Seed of the sink's failure injection")
+        parser.add_argument("--output", help="Also write the JSON report to this file")
+        parser.add_argument("--keep-data", action="store_true",
+                            help="Keep the synthetic recipients and campaigns")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options["sizes"].split(",") if size.strip())
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+        if not sizes or sizes[0] <= 0:
+            raise CommandError("--sizes must be positive")
+
+        data = BenchmarkData()
+        report = {"meta": self.meta(options), "results": []}
+        try:
+            data.create_fixtures()
+            client_ids = []
+            for size in sizes:
+                # Recipients are added to the set of the previous size
+                client_ids += data.create_recipients(size - len(client_ids), options["distinct_contexts"])
+                sink = SMTPSink(
+                    latency=options["latency_ms"] / 1000,
+                    connect_latency=options["connect_latency_ms"] / 1000,
+                    fail_rate=options["fail_rate"],
+                    reject_rate=options["reject_rate"],
+                    seed=options["seed"],
+                )
+                with sink:
+                    result = run_campaign(
+                        data,
+                        client_ids,
+                        sink,
+                        delivery_engine=options["engine"],
+                        chunk_size=options["chunk_size"],
+                        max_connections=options["max_connections"],
+                    )
+                report["results"].append(result)
+                self.stderr.write(
+                    f"{size} recipients: {result['messages_per_second']} msg/s, "
+                    f"{result['db_queries']} queries, peak RSS {result['peak_rss_bytes'] // (1024 * 1024)} MB"
+                )
+        finally:
+            if not options["keep_data"]:
+                data.cleanup()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "engine": options["engine"],
+            "latency_ms": options["latency_ms"],
+            "connect_latency_ms": options["connect_latency_ms"],
+            "fail_rate": options["fail_rate"],
+            "reject_rate": options["reject_rate"],
+            "distinct_contexts": options["distinct_contexts"],
+            "chunk_size": options["chunk_size"],
+            "max_connections": options["max_connections"],
+        }
@@ -0,0 +1,98 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.benchmark.dataset import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate a synthetic load test dataset: client users, mail types "
+        "with templates, senders and a history of campaigns and MailLog rows. "
+        "Rows are tagged with --prefix; run again to grow the dataset, or "
+        "--delete to remove it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="synthetic",
+                            help="Tag of the dataset's usernames, emails and names")
+        parser.add_argument("--clients", type=int, default=100000,
+                            help="Client users to add")
+        parser.add_argument("--logs", type=int, default=1000000,
+                            help="MailLog rows to add, in campaigns")
+        parser.add_argument("--mail-types", type=int, default=20,
+                            help="Mail types (each with a template)")
+        parser.add_argument("--senders", type=int, default=5,
+                            help="Sender addresses")
+        parser.add_argument("--companies", type=int, default=None,
+                            help="Distinct company names (default: clients / 20)")
+        parser.add_argument("--campaign-size", type=int, default=500,
+                            help="Median recipients per campaign (sizes are log-normal)")
+        parser.add_argument("--days", type=int, default=180,
+                            help="Spread the campaigns over the last DAYS days")
+        parser.add_argument("--status-mix", default="0.95,0.04,0.01",
+                            help="Weights of SENT,FAILED,PENDING rows")
+        parser.add_argument("--password", default="synthetic-password",
+                            help="Password of every generated user (for load tests)")
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Rows per INSERT")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed, for reproducible datasets")
+        parser.add_argument("--delete", action="store_true",
+                            help="Delete the dataset with this prefix instead")
+
+    def handle(self, *args, **options):
+        dataset = SyntheticDataset(
+            prefix=options["prefix"],
+            password=options["password"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        if options["delete"]:
+            dataset.delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted dataset '{options['prefix']}'"))
+            return
+
+        try:
+            status_weights = tuple(float(w) for w in options["status_mix"].split(","))
+        except ValueError:
+            raise CommandError("--status-mix must be three comma separated numbers")
+        if len(status_weights) != 3 or sum(status_weights) <= 0:
+            raise CommandError("--status-mix must be three comma separated numbers")
+        if options["mail_types"] <= 0 or options["senders"] <= 0:
+            raise CommandError("--mail-types and --senders must be positive")
+
+        started = perf_counter()
+        dataset.create_reference_data(mail_types=options["mail_types"], senders=options["senders"])
+
+        self.stderr.write(f"Creating {options['clients']} clients...")
+        dataset.create_clients(options["clients"], companies=options["companies"])
+        client_ids = list(dataset.existing_clients().values_list("id", flat=True))
+        self.stderr.write(f"  {len(client_ids)} clients in dataset ({perf_counter() - started:.1f}s)")
+
+        if options["logs"] and not client_ids:
+            raise CommandError("The dataset has no clients to send to")
+
+        total = options["logs"]
+        step = max(total // 20, 1)
+        reported = [0]
+
+        def progress(created):
+            if created - reported[0] >= step or created == total:
+                reported[0] = created
+                elapsed = perf_counter() - started
+                self.stderr.write(f"  {created}/{total} mail logs ({elapsed:.1f}s)")
+
+        self.stderr.write(f"Creating {total} mail logs...")
+        dataset.create_history(
+            client_ids,
+            total,
+            days=options["days"],
+            campaign_size=options["campaign_size"],
+            status_weights=status_weights,
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Dataset '{options['prefix']}' ready in {perf_counter() - started:.1f}s "
+            f"(users log in with --password; admin: {options['prefix']}-admin)"
+        ))
@@ -0,0 +1,82 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.benchmark.dataset import SyntheticDataset
+from mailings.benchmark.loadtest import QUERY_BUDGETS, LoadTest, dataset_endpoints
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the read API in-process against a generate_dataset dataset: "
+        "drive each endpoint from concurrent threads, report latency "
+        "percentiles and fail when an endpoint exceeds its SQL query budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="synthetic",
+                            help="Prefix of the generate_dataset dataset to use")
+        parser.add_argument("--endpoints", default=",".join(QUERY_BUDGETS),
+                            help="Comma separated endpoints to test")
+        parser.add_argument("--concurrency", type=int, default=4,
+                            help="Concurrent client threads per endpoint")
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests per endpoint")
+        parser.add_argument("--budget", action="append", default=[], metavar="ENDPOINT=QUERIES",
+                            help="Override an endpoint's query budget (repeatable)")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Seed of the request id sampling")
+        parser.add_argument("--output", help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options["endpoints"].split(",") if name.strip()]
+        unknown = set(names) - set(QUERY_BUDGETS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))} (known: {', '.join(QUERY_BUDGETS)})")
+
+        budgets = {}
+        for item in options["budget"]:
+            name, _, queries = item.partition("=")
+            if name not in QUERY_BUDGETS or not queries.isdigit():
+                raise CommandError(f"--budget expects ENDPOINT=QUERIES, got '{item}'")
+            budgets[name] = int(queries)
+
+        if options["concurrency"] <= 0 or options["requests"] < options["concurrency"]:
+            raise CommandError("--concurrency must be positive and at most --requests")
+
+        dataset = SyntheticDataset.load(options["prefix"])
+        if dataset is None:
+            raise CommandError(
+                f"No dataset '{options['prefix']}': run manage.py generate_dataset --prefix {options['prefix']} first"
+            )
+        try:
+            endpoints = dataset_endpoints(dataset, budgets)
+        except ValueError as e:
+            raise CommandError(str(e))
+        endpoints = [endpoint for endpoint in endpoints if endpoint.name in names]
+
+        report = LoadTest(
+            endpoints,
+            concurrency=options["concurrency"],
+            requests=options["requests"],
+            seed=options["seed"],
+        ).run()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+        failures = []
+        for name, result in report.items():
+            if result["over_budget"]:
+                failures.append(
+                    f"{name}: {result['max_queries']} queries (budget {result['query_budget']}) "
+                    f"on {result['max_queries_path']}"
+                )
+            if result["errors"]:
+                failures.append(f"{name}: error responses {result['errors']}")
+        if failures:
+            raise CommandError("Load test failed:\n  " + "\n  ".join(failures))
+        self.stderr.write(self.style.SUCCESS(f"{len(report)} endpoints within their query budgets"))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('client', '0004_delete_emaillog'),
+        ('mailings', '0003_remove_maillog_body_remove_maillog_recipient_count_and_more'),
+        ('templates', '0006_delete_attachmentfile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maillog',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='maillog',
+            index=models.Index(fields=['task_id', 'status'], name='mailings_ma_task_id_8ab945_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0004_maillog_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maillog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='maillog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
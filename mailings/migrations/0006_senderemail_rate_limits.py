@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0005_maillog_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='senderemail',
+            name='rate_limit_per_day',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='senderemail',
+            name='rate_limit_per_minute',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
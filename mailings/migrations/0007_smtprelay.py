@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0006_senderemail_rate_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMTPRelay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('host', models.CharField(max_length=255)),
+                ('port', models.PositiveIntegerField(default=587)),
+                ('username', models.CharField(blank=True, max_length=255)),
+                ('password', models.CharField(blank=True, max_length=255)),
+                ('use_tls', models.BooleanField(default=True, help_text='STARTTLS')),
+                ('use_ssl', models.BooleanField(default=False, help_text='Implicit TLS (usually port 465)')),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('max_connections', models.PositiveSmallIntegerField(default=2)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'SMTP Relay',
+                'verbose_name_plural': 'SMTP Relays',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:28
+
+import django.db.models.deletion
+import mailings.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0008_attachmentblob'),
+        ('templates', '0006_delete_attachmentfile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('task_id', models.CharField(default=mailings.models.new_campaign_key, editable=False, max_length=64, unique=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField(blank=True)),
+                ('dynamic_vars', models.JSONField(blank=True, default=dict)),
+                ('attachments', models.JSONField(blank=True, default=list)),
+                ('delivery_engine', models.CharField(default='pool', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns', to=settings.AUTH_USER_MODEL)),
+                ('mail_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='templates.mailtype')),
+                ('sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='mailings.senderemail')),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='templates.emailtemplate')),
+            ],
+            options={
+                'verbose_name': 'Campaign',
+                'verbose_name_plural': 'Campaigns',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='maillog',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='mailings.campaign'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0010_campaign_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='timing_profile',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0011_campaign_timing_profile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='campaign',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SENDING', 'Sending'), ('FINISHED', 'Finished'), ('EXPIRED', 'Expired')], default='QUEUED', max_length=20),
+        ),
+    ]
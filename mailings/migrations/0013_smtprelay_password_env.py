@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0012_campaign_expired_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smtprelay',
+            name='password_env',
+            field=models.CharField(blank=True, help_text='Environment variable holding the password (used instead of password)', max_length=100),
+        ),
+    ]
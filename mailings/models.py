@@ -1,3 +1,5 @@
+import os
+import uuid
 from django.db import models
 from client.models import Client  # Explicit import is better for type hinting
 from templates.models import MailType, EmailTemplate
@@ -6,6 +8,11 @@ class SenderEmail(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
 
+    # Sending caps of the mailbox behind this sender (e.g. Gmail quotas),
+    # enforced across all workers by the shared rate limiter. Blank = no cap.
+    rate_limit_per_minute = models.PositiveIntegerField(null=True, blank=True)
+    rate_limit_per_day = models.PositiveIntegerField(null=True, blank=True)
+
     def __str__(self):
         return f"{self.name} <{self.email}>"
 
@@ -13,6 +20,172 @@ class SenderEmail(models.Model):
         verbose_name = "Sender Email"
         verbose_name_plural = "Sender Emails"
 
+
+class SMTPRelay(models.Model):
+    """
+    One outgoing SMTP relay. Workers spread traffic over the active relays
+    by weight and live health, and pick up edits without a restart. With
+    no active relay, the EMAIL_HOST settings are used.
+    """
+    name = models.CharField(max_length=100)
+    host = models.CharField(max_length=255)
+    port = models.PositiveIntegerField(default=587)
+    username = models.CharField(max_length=255, blank=True)
+    # Prefer password_env: the secret then stays in the workers' environment
+    # instead of the database (password is stored as typed)
+    password = models.CharField(max_length=255, blank=True)
+    password_env = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Environment variable holding the password (used instead of password)",
+    )
+    use_tls = models.BooleanField(default=True, help_text="STARTTLS")
+    use_ssl = models.BooleanField(default=False, help_text="Implicit TLS (usually port 465)")
+
+    # Share of traffic relative to the other relays, before health scoring
+    weight = models.PositiveSmallIntegerField(default=1)
+    # Concurrent SMTP sessions per worker process
+    max_connections = models.PositiveSmallIntegerField(default=2)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.host}:{self.port})"
+
+    def get_password(self):
+        if self.password_env:
+            return os.environ.get(self.password_env, "")
+        return self.password
+
+    class Meta:
+        verbose_name = "SMTP Relay"
+        verbose_name_plural = "SMTP Relays"
+
+
+class AttachmentBlob(models.Model):
+    """
+    One attachment file in the content-addressed store, stored once per
+    distinct content at MEDIA_ROOT/attachments/<sha[:2]>/<sha[2:4]>/<sha>.
+
+    ref_count is the number of campaigns still using the blob; blobs back
+    at zero are deleted by the periodic garbage collection.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last upload or release: GC leaves recently used blobs alone
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes, {self.ref_count} refs)"
+
+    class Meta:
+        verbose_name = "Attachment Blob"
+        verbose_name_plural = "Attachment Blobs"
+
+
+def new_campaign_key():
+    return str(uuid.uuid4())
+
+
+class Campaign(models.Model):
+    """
+    One bulk send and everything needed to render it. Celery messages only
+    carry the campaign id (and the inline image version ids): workers load
+    the rest from here, so broker payloads stay small whatever the size
+    of the campaign. Its recipients are its MailLog rows.
+
+    Progress is kept on the row itself: the counters are moved with F()
+    increments whenever outcomes are written (see MailLogBuffer), so
+    reading a campaign's progress never touches MailLog.
+
+    A campaign no worker picked up in time is EXPIRED by the attachment
+    janitor: its recipients are failed and its attachments released.
+    """
+    class StatusChoices(models.TextChoices):
+        QUEUED = 'QUEUED', 'Queued'
+        SENDING = 'SENDING', 'Sending'
+        FINISHED = 'FINISHED', 'Finished'
+        EXPIRED = 'EXPIRED', 'Expired'
+
+    # Statuses a campaign never leaves
+    FINAL_STATUSES = (StatusChoices.FINISHED, StatusChoices.EXPIRED)
+
+    name = models.CharField(max_length=255, blank=True)
+    # Campaign key: MailLog.task_id of its recipients and the id of the
+    # chord callback, returned to API callers as task_id
+    task_id = models.CharField(max_length=64, unique=True, default=new_campaign_key, editable=False)
+
+    mail_type = models.ForeignKey(MailType, on_delete=models.PROTECT)
+    template = models.ForeignKey(EmailTemplate, on_delete=models.SET_NULL, null=True, blank=True)
+    sender = models.ForeignKey('mailings.SenderEmail', on_delete=models.SET_NULL, null=True, blank=True)
+    created_by = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campaigns'
+    )
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField(blank=True)
+    dynamic_vars = models.JSONField(default=dict, blank=True)
+    # [{"sha256", "path", "filename", "content_type"}] from the attachment store
+    attachments = models.JSONField(default=list, blank=True)
+    delivery_engine = models.CharField(max_length=10, default="pool")
+
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.QUEUED
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    # Recipients without a final outcome yet, including those waiting for a retry
+    pending_count = models.PositiveIntegerField(default=0)
+
+    # Phases: queued (created_at) -> sending (started_at) -> finished
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_progress_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Per-stage timing histograms merged over every worker run
+    # (see mailings.services.stage_profile.StageProfile)
+    timing_profile = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return self.name or self.task_id
+
+    @property
+    def processed_count(self):
+        return self.sent_count + self.failed_count
+
+    def sending_seconds(self):
+        """Time spent sending so far (or in total, once finished)."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at or self.last_progress_at or self.started_at
+        return max(0.0, (end - self.started_at).total_seconds())
+
+    def throughput(self):
+        """Recipients with a final outcome per second of sending."""
+        seconds = self.sending_seconds()
+        return self.processed_count / seconds if seconds else 0.0
+
+    def eta_seconds(self):
+        """Estimated seconds left at the current throughput, None if unknown."""
+        rate = self.throughput()
+        if self.status in self.FINAL_STATUSES:
+            return 0.0
+        return self.pending_count / rate if rate else None
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Campaign"
+        verbose_name_plural = "Campaigns"
+
 # working model: ---------------------------------------------------------
 
 # class MailLog(models.Model):
@@ -113,6 +286,13 @@ class MailLog(models.Model):
 
     # 3. TRACEABILITY
     task_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+    campaign = models.ForeignKey(
+        'mailings.Campaign',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='logs'
+    )
 
     # 4. METADATA
     campaign_name = models.CharField(max_length=255, blank=True, db_index=True)
@@ -135,6 +315,13 @@ class MailLog(models.Model):
     error_message = models.TextField(blank=True, null=True)
     sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    # 6. DELIVERY CLAIM (set when a worker moves the row PENDING -> PROCESSING)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    # 7. PER-RECIPIENT RETRY (transient SMTP errors put the row back to PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+
     class Meta:
         ordering = ['-sent_at']
         verbose_name = "Mail Log"
@@ -145,6 +332,7 @@ class MailLog(models.Model):
             models.Index(fields=['campaign_name']),
             models.Index(fields=['sender_email']),
             models.Index(fields=['created_by']), # Added for "Find all emails sent by User X"
+            models.Index(fields=['task_id', 'status']), # Workers claim a campaign's PENDING rows
         ]
 
     def __str__(self):
@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import SenderEmail, MailLog
+from .models import SenderEmail, Campaign, MailLog
+from .services.stage_profile import StageProfile
 
 class SenderEmailSerializer(serializers.ModelSerializer):
     class Meta:
         model = SenderEmail
-        fields = ['id', 'name', 'email']
+        fields = ['id', 'name', 'email', 'rate_limit_per_minute', 'rate_limit_per_day']
 
 class MailLogListSerializer(serializers.ModelSerializer):
     # IMPROVEMENT: Use source for read-only nested data
@@ -34,6 +35,44 @@ class MailLogDetailSerializer(serializers.ModelSerializer):
             return SenderEmailSerializer(obj.sender_email).data
         return None
 
+class CampaignStatusSerializer(serializers.ModelSerializer):
+    # Everything comes from the Campaign row: no MailLog query
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    processed_count = serializers.IntegerField(read_only=True)
+    sending_seconds = serializers.SerializerMethodField()
+    throughput_per_second = serializers.SerializerMethodField()
+    eta_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Campaign
+        fields = [
+            'id', 'task_id', 'name', 'status', 'status_display',
+            'total_count', 'sent_count', 'failed_count', 'pending_count', 'processed_count',
+            'created_at', 'started_at', 'last_progress_at', 'finished_at',
+            'sending_seconds', 'throughput_per_second', 'eta_seconds',
+        ]
+
+    def get_sending_seconds(self, obj):
+        return round(obj.sending_seconds(), 3)
+
+    def get_throughput_per_second(self, obj):
+        return round(obj.throughput(), 2)
+
+    def get_eta_seconds(self, obj):
+        eta = obj.eta_seconds()
+        return round(eta, 1) if eta is not None else None
+
+class CampaignTimingSerializer(serializers.ModelSerializer):
+    # Totals and p50/p95/p99 per stage, over every worker run of the campaign
+    timing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Campaign
+        fields = ['id', 'task_id', 'name', 'status', 'processed_count', 'timing']
+
+    def get_timing(self, obj):
+        return StageProfile.from_dict(obj.timing_profile).summary()
+
 # serializers.py
 class AdminBulkMailSerializer(serializers.Serializer):
     # campaign_name is new updated one-------------------------
@@ -43,6 +82,12 @@ class AdminBulkMailSerializer(serializers.Serializer):
     sender_id = serializers.IntegerField()
     subject = serializers.CharField(required=False, allow_blank=True)
     message = serializers.CharField(required=False, allow_blank=True)
+    delivery_engine = serializers.ChoiceField(
+        choices=["pool", "async"],
+        required=False,
+        default="pool",
+        help_text="pool: pooled SMTP sessions, async: concurrent asyncio sessions",
+    )
     
     # ✅ REMOVED: attachment_ids field completely
     
@@ -0,0 +1,251 @@
+# mailings/services/async_engine.py
+
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+
+import aiosmtplib
+from django.conf import settings
+from django.core.mail.message import sanitize_address
+
+from mailings.services.metrics import MIME_BUILD_SECONDS, SMTP_CONNECT_SECONDS, SMTP_SEND_SECONDS
+from mailings.services.stage_profile import stage
+
+logger = logging.getLogger(__name__)
+
+
+def smtp_settings():
+    """aiosmtplib connection arguments equivalent to Django's EMAIL_* settings."""
+    return {
+        "hostname": settings.EMAIL_HOST,
+        "port": settings.EMAIL_PORT,
+        "username": settings.EMAIL_HOST_USER or None,
+        "password": settings.EMAIL_HOST_PASSWORD or None,
+        "use_tls": bool(getattr(settings, "EMAIL_USE_SSL", False)),
+        "start_tls": bool(settings.EMAIL_USE_TLS),
+        "timeout": getattr(settings, "EMAIL_TIMEOUT", None) or 60,
+    }
+
+
+def as_smtplib_error(error):
+    """
+    Map aiosmtplib reply errors onto their smtplib counterparts, so the
+    retry classification (is_transient_smtp_error) works for both engines.
+    Disconnects and timeouts already subclass ConnectionError/TimeoutError.
+    """
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return smtplib.SMTPRecipientsRefused(
+            {r.recipient: (r.code, r.message) for r in error.recipients}
+        )
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return smtplib.SMTPResponseException(error.code, error.message)
+    return error
+
+
+class AsyncDeliveryEngine:
+    """
+    Keeps `concurrency` SMTP sessions open from one process, on an asyncio
+    event loop running in a background thread.
+
+    The synchronous send loop (ORM, rendering, logging) stays where it is
+    and feeds rendered messages in with submit(). The bounded asyncio.Queue
+    between them is the backpressure: submit() blocks while `queue_size`
+    messages are waiting, so rendering never runs far ahead of the wire.
+    Outcomes are handed back via drain()/join() as (item, error) pairs,
+    error being None for a delivered message. With `on_result`, each send
+    is also reported as on_result(elapsed_seconds, error) from the loop
+    thread (relay health, see get_async_engine).
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency=10,
+        queue_size=100,
+        max_messages_per_connection=100,
+        connection_kwargs=None,
+        on_result=None,
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.connection_kwargs = connection_kwargs or smtp_settings()
+        self.relay = self.connection_kwargs.get("hostname") or ""
+        self.on_result = on_result
+
+        self._done = deque()  # appended on the loop thread, popped by the caller
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._workers = []
+
+    # --- lifecycle (called from the sync side) ---
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="smtp-async-engine",
+            daemon=True,
+        )
+        self._thread.start()
+        self._call(self._start_workers())
+        return self
+
+    def close(self):
+        """Deliver whatever is queued, close every session, return the last outcomes."""
+        if self._loop is None:
+            return []
+        try:
+            self._call(self._stop_workers())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+        return self.drain()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # --- feeding and collecting (called from the sync side) ---
+
+    def submit(self, item, email):
+        """Queue one Django email; blocks while the queue is full."""
+        from_email = sanitize_address(email.from_email, email.encoding or settings.DEFAULT_CHARSET)
+        recipients = [
+            sanitize_address(addr, email.encoding or settings.DEFAULT_CHARSET)
+            for addr in email.recipients()
+        ]
+        # Serialize here, not on the loop: it is CPU work and would stall every session
+        with stage("mime", MIME_BUILD_SECONDS.labels(part="message")):
+            payload = email.message().as_bytes(linesep="\r\n")
+        # Time blocked here is time the sessions are behind (backpressure)
+        with stage("smtp_queue_wait"):
+            self._call(self._queue.put((item, from_email, recipients, payload)))
+
+    def drain(self):
+        """Outcomes finished so far, without waiting."""
+        done = []
+        while self._done:
+            done.append(self._done.popleft())
+        return done
+
+    def join(self):
+        """Wait until every submitted message has an outcome, and return them."""
+        with stage("smtp_queue_wait"):
+            self._call(self._queue.join())
+        return self.drain()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    # --- event loop side ---
+
+    async def _start_workers(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(n)) for n in range(self.concurrency)
+        ]
+
+    async def _stop_workers(self):
+        for _ in self._workers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(**self.connection_kwargs)
+        started = time.perf_counter()
+        await smtp.connect()
+        SMTP_CONNECT_SECONDS.labels(relay=self.relay).observe(time.perf_counter() - started)
+        return smtp
+
+    async def _sendmail(self, smtp, from_email, recipients, payload):
+        started = time.perf_counter()
+        await smtp.sendmail(from_email, recipients, payload)
+        SMTP_SEND_SECONDS.labels(relay=self.relay).observe(time.perf_counter() - started)
+
+    async def _worker(self, n):
+        smtp = None
+        sent_on_session = 0
+        try:
+            while True:
+                job = await self._queue.get()
+                if job is None:
+                    self._queue.task_done()
+                    break
+
+                item, from_email, recipients, payload = job
+                error = None
+                started = time.monotonic()
+                try:
+                    if smtp is not None and sent_on_session >= self.max_messages_per_connection:
+                        await self._quit(smtp)
+                        smtp = None
+                    if smtp is None:
+                        smtp = await self._connect()
+                        sent_on_session = 0
+                    try:
+                        await self._sendmail(smtp, from_email, recipients, payload)
+                    except aiosmtplib.SMTPServerDisconnected:
+                        # Idle session dropped by the relay: reconnect once
+                        logger.info(f"SMTP session {n} dropped, reconnecting")
+                        smtp = await self._connect()
+                        sent_on_session = 0
+                        await self._sendmail(smtp, from_email, recipients, payload)
+                    sent_on_session += 1
+                except Exception as e:
+                    error = as_smtplib_error(e)
+                    if isinstance(e, (ConnectionError, TimeoutError)) and smtp is not None:
+                        smtp.close()
+                        smtp = None
+                finally:
+                    self._report(time.monotonic() - started, error)
+                    self._done.append((item, error))
+                    self._queue.task_done()
+        finally:
+            if smtp is not None:
+                await self._quit(smtp)
+
+    def _report(self, elapsed, error):
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(elapsed, error)
+        except Exception:
+            logger.exception("❌ Failed to report an SMTP send outcome")
+
+    async def _quit(self, smtp):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+def get_async_engine(relay=None, router=None):
+    """
+    A new, not yet started engine configured from settings, with its
+    sessions opened to `relay` (an SMTP relay router entry) if given.
+    With the router, every send feeds the relay's latency and error
+    health, as batches sent through the router do.
+    """
+    on_result = None
+    if relay is not None and router is not None:
+        def on_result(elapsed, error):
+            router.record(relay, elapsed, 1, [error])
+
+    return AsyncDeliveryEngine(
+        concurrency=settings.EMAIL_ASYNC_CONCURRENCY,
+        queue_size=settings.EMAIL_ASYNC_QUEUE_SIZE,
+        max_messages_per_connection=settings.EMAIL_POOL_MAX_MESSAGES_PER_CONNECTION,
+        connection_kwargs=relay.async_kwargs if relay is not None else None,
+        on_result=on_result,
+    )
@@ -0,0 +1,189 @@
+# mailings/services/attachment_janitor.py
+
+import os
+import time
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from mailings.models import AttachmentBlob, Campaign
+from mailings.services.attachment_store import release_blobs, store_root
+from mailings.services.campaign_events import publish_campaign_progress
+from mailings.services.campaign_recipients import fail_unsent_logs
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_ERROR = "Campaign expired before a worker picked it up"
+STALLED_ERROR = "Campaign expired: its workers stopped making progress"
+
+
+def legacy_temp_dir():
+    """Where uploads were saved before the attachment store (plain, per campaign files)."""
+    return os.path.join(os.path.abspath(settings.MEDIA_ROOT), 'temp_emails')
+
+
+def abandoned_campaigns(now, max_age_seconds, stall_seconds=None):
+    """
+    Campaigns no worker will finish:
+    - still QUEUED max_age_seconds after dispatch: no worker ever started
+      them (lost or purged broker messages)
+    - SENDING without progress for stall_seconds: their workers died and
+      the tasks are gone (no redelivery, chord never completing)
+    """
+    abandoned = Q(
+        status=Campaign.StatusChoices.QUEUED,
+        started_at__isnull=True,
+        created_at__lt=now - timedelta(seconds=max_age_seconds),
+    )
+    if stall_seconds is not None:
+        stalled_since = now - timedelta(seconds=stall_seconds)
+        abandoned |= Q(status=Campaign.StatusChoices.SENDING) & (
+            Q(last_progress_at__lt=stalled_since)
+            | Q(last_progress_at__isnull=True, started_at__lt=stalled_since)
+        )
+    return Campaign.objects.filter(abandoned)
+
+
+def expire_abandoned_campaigns(max_age_seconds, stall_seconds=None):
+    """
+    Expire the campaigns no worker will finish (see abandoned_campaigns):
+    their attachment references would otherwise be held forever. Their
+    recipients without an outcome are failed and their blob references
+    released. Returns the number of campaigns expired.
+    """
+    now = timezone.now()
+    candidates = list(abandoned_campaigns(now, max_age_seconds, stall_seconds).values_list('pk', flat=True))
+
+    expired = 0
+    for pk in candidates:
+        with transaction.atomic():
+            # Re-check under the row lock: a worker may have started it, or made progress, since
+            campaign = (
+                abandoned_campaigns(now, max_age_seconds, stall_seconds)
+                .select_for_update()
+                .filter(pk=pk)
+                .first()
+            )
+            if campaign is None:
+                continue
+            stalled = campaign.status == Campaign.StatusChoices.SENDING
+            failed = fail_unsent_logs(campaign.task_id, STALLED_ERROR if stalled else EXPIRED_ERROR)
+            Campaign.objects.filter(pk=pk).update(
+                status=Campaign.StatusChoices.EXPIRED,
+                finished_at=now,
+                failed_count=F('failed_count') + failed,
+                pending_count=0,
+            )
+            release_blobs([att['sha256'] for att in campaign.attachments if att.get('sha256')])
+        publish_campaign_progress(pk, force=True)
+        logger.warning(
+            f"⌛ Campaign {campaign.task_id} expired {'stalled' if stalled else 'unsent'}: {failed} recipients failed"
+        )
+        expired += 1
+    return expired
+
+
+def referenced_legacy_paths():
+    """Plain attachment files campaigns that may still send refer to."""
+    paths = set()
+    unfinished = Campaign.objects.exclude(status__in=Campaign.FINAL_STATUSES)
+    for attachments in unfinished.values_list('attachments', flat=True):
+        paths.update(
+            os.path.abspath(att['path'])
+            for att in attachments or []
+            if not att.get('sha256') and att.get('path')
+        )
+    return paths
+
+
+def sweep_stale_files(directory, max_age_seconds, keep=frozenset()):
+    """Delete files under `directory` not modified for max_age_seconds, except the `keep` paths."""
+    cutoff = time.time() - max_age_seconds
+    deleted = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if path in keep:
+                continue
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+    return deleted
+
+
+def sweep_unreferenced_blob_files(grace_seconds, batch_size=1000):
+    """
+    Delete store files without an AttachmentBlob row (a blob transaction
+    rolled back after the file was moved into place), once older than
+    grace_seconds. Returns the number of files deleted.
+    """
+    root = store_root()
+    tmp_dir = os.path.join(root, 'tmp')
+    cutoff = time.time() - grace_seconds
+    candidates = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if os.path.join(dirpath, d) != tmp_dir]
+        for name in files:
+            path = os.path.join(dirpath, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    candidates[name] = path
+            except FileNotFoundError:
+                pass
+
+    names = list(candidates)
+    known = set()
+    for start in range(0, len(names), batch_size):
+        known.update(
+            AttachmentBlob.objects.filter(sha256__in=names[start:start + batch_size])
+            .values_list('sha256', flat=True)
+        )
+
+    deleted = 0
+    for name, path in candidates.items():
+        if name in known:
+            continue
+        try:
+            os.remove(path)
+            deleted += 1
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+@shared_task(ignore_result=True)
+def reclaim_orphaned_attachments():
+    """
+    Periodic (celery beat) janitor for attachment files nothing will send:
+    attachments of campaigns abandoned in the queue or stalled while
+    sending, interrupted uploads in the store's tmp dir, legacy temp_emails
+    files and blob files without a row. Referenced blobs are left to
+    collect_attachment_blobs.
+    """
+    result = {
+        "expired_campaigns": expire_abandoned_campaigns(
+            settings.ATTACHMENT_ORPHAN_CAMPAIGN_SECONDS,
+            stall_seconds=settings.CAMPAIGN_STALL_SECONDS,
+        ),
+        "legacy_files": sweep_stale_files(
+            legacy_temp_dir(),
+            settings.ATTACHMENT_ORPHAN_FILE_SECONDS,
+            keep=referenced_legacy_paths(),
+        ),
+        "tmp_files": sweep_stale_files(
+            os.path.join(store_root(), 'tmp'),
+            settings.ATTACHMENT_ORPHAN_FILE_SECONDS,
+        ),
+        "blob_files": sweep_unreferenced_blob_files(settings.ATTACHMENT_GC_GRACE_SECONDS),
+    }
+    if any(result.values()):
+        logger.info(f"🧹 Attachment janitor: {result}")
+    return result
@@ -1,52 +1,43 @@
-import os
-import uuid
 import logging
 from django.conf import settings
 from io import BytesIO
 
+from mailings.services.attachment_store import store_upload, blob_path
+from mailings.services.attachment_upload import check_attachment_sizes
+
 logger = logging.getLogger(__name__)
 
 def save_attachments_to_disk(uploaded_files):
+    """
+    Put uploads into the content-addressed attachment store (identical
+    files are stored once, across campaigns) and return the attachment
+    dicts the bulk mail tasks expect. The "sha256" key is what the
+    campaign takes and releases its reference on.
+
+    Uploads received through AttachmentUploadHandler were size-checked and
+    hashed on arrival; the caps are checked again here for other callers.
+    """
     attachments_data = []
-    
+    check_attachment_sizes([f.size for f in uploaded_files])
+
     # 1. Determine the Path
     media_root = getattr(settings, 'MEDIA_ROOT', None)
     if not media_root:
         raise ValueError("MEDIA_ROOT is not defined in settings.py. Cannot save files.")
 
-    # Ensure the path is absolute
-    media_root = os.path.abspath(media_root)
-    temp_dir = os.path.join(media_root, 'temp_emails') # It is 'temp_emails' (plural)
-    
-    # Force create the directory
-    os.makedirs(temp_dir, exist_ok=True)
-
-    # ✅ PRINT THIS TO CONSOLE SO YOU CAN FIND IT
-    print(f"🔥 SAVING FILES TO: {temp_dir}") 
-
     for f in uploaded_files:
         try:
-            ext = f.name.split('.')[-1]
-            filename = f"{uuid.uuid4()}.{ext}"
-            temp_path = os.path.join(temp_dir, filename)
-
-            # Write to disk
-            with open(temp_path, 'wb+') as destination:
-                for chunk in f.chunks():
-                    destination.write(chunk)
-            
-            # Verify existence
-            if not os.path.exists(temp_path):
-                raise IOError(f"File was not created at {temp_path}")
+            blob = store_upload(f)
 
             attachments_data.append({
-                "path": temp_path,
+                "sha256": blob.sha256,
+                "path": blob_path(blob.sha256),
                 "filename": f.name,
                 "content_type": getattr(f, 'content_type', 'application/octet-stream')
             })
-            
-            print(f"✅ Successfully saved: {filename} at {temp_path}")
-            
+
+            logger.info(f"✅ Stored attachment {f.name} as {blob.sha256[:12]} ({blob.size} bytes)")
+
         except Exception as e:
             logger.error(f"Failed to save attachment {f.name}: {e}")
             raise  # Crash the request if saving fails
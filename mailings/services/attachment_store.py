@@ -0,0 +1,172 @@
+# mailings/services/attachment_store.py
+
+import os
+import uuid
+import hashlib
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from mailings.models import AttachmentBlob
+from mailings.services.metrics import ATTACHMENT_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def store_root():
+    return os.path.join(os.path.abspath(settings.MEDIA_ROOT), 'attachments')
+
+
+def blob_path(sha256):
+    """MEDIA_ROOT/attachments/ab/cd/abcd... for a hex SHA-256 digest."""
+    return os.path.join(store_root(), sha256[:2], sha256[2:4], sha256)
+
+
+def new_tmp_path():
+    """A fresh path in the store's tmp dir, on the blobs' filesystem (rename, not copy)."""
+    tmp_dir = os.path.join(store_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, uuid.uuid4().hex)
+
+
+class StoredUpload(UploadedFile):
+    """
+    An upload already written to the store's tmp dir and hashed while it
+    was received (see AttachmentUploadHandler): store_upload() only has
+    to rename it into place. Closing it deletes the tmp file if it was
+    not stored, like Django's TemporaryUploadedFile.
+    """
+
+    def __init__(self, file, tmp_path, sha256, name, content_type, size, charset=None, content_type_extra=None):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.tmp_path = tmp_path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.tmp_path
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+
+
+def store_upload(uploaded_file):
+    """
+    Stream an upload into the store and return its AttachmentBlob.
+
+    The file is hashed while it is written to a temporary file, so it is
+    read once and never held in memory. Content that is already stored is
+    not written again: the temporary copy is dropped and the existing blob
+    is returned. A StoredUpload was hashed on arrival and is moved as is.
+    """
+    if isinstance(uploaded_file, StoredUpload):
+        try:
+            uploaded_file.file.close()
+            ATTACHMENT_BYTES.labels(stage="uploaded").inc(uploaded_file.size)
+            return _commit_blob(uploaded_file.tmp_path, uploaded_file.sha256, uploaded_file.size)
+        finally:
+            uploaded_file.close()
+
+    tmp_path = new_tmp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+                destination.write(chunk)
+        ATTACHMENT_BYTES.labels(stage="uploaded").inc(size)
+        return _commit_blob(tmp_path, digest.hexdigest(), size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _commit_blob(tmp_path, sha256, size):
+    path = blob_path(sha256)
+    with transaction.atomic():
+        AttachmentBlob.objects.get_or_create(sha256=sha256, defaults={'size': size})
+        # The row lock serializes us with the garbage collector for this blob
+        blob = AttachmentBlob.objects.select_for_update().get(sha256=sha256)
+        if os.path.exists(path):
+            logger.info(f"♻️ Attachment {sha256[:12]} already stored, reusing it")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        AttachmentBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now())
+    return blob
+
+
+def acquire_blobs(sha256s):
+    """Take one reference per occurrence, for a campaign that will send the blobs."""
+    for sha256, count in Counter(sha256s).items():
+        AttachmentBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + count)
+
+
+def release_blobs(sha256s):
+    """Drop references taken by acquire_blobs(); unreferenced blobs are left to the GC."""
+    now = timezone.now()
+    for sha256, count in Counter(sha256s).items():
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                continue
+            AttachmentBlob.objects.filter(pk=blob.pk).update(
+                ref_count=max(0, blob.ref_count - count),
+                last_used_at=now,
+            )
+
+
+def collect_garbage(grace_seconds):
+    """
+    Delete blobs no campaign refers to and that were not uploaded or
+    released in the last grace_seconds (an upload takes its reference only
+    when the campaign is dispatched). Returns the number of blobs deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    candidates = list(
+        AttachmentBlob.objects
+        .filter(ref_count=0, last_used_at__lt=cutoff)
+        .values_list('pk', flat=True)
+    )
+
+    deleted = 0
+    for pk in candidates:
+        with transaction.atomic():
+            # Re-check under the row lock: an upload or campaign may have taken it
+            blob = (
+                AttachmentBlob.objects.select_for_update()
+                .filter(pk=pk, ref_count=0, last_used_at__lt=cutoff)
+                .first()
+            )
+            if blob is None:
+                continue
+            try:
+                os.remove(blob_path(blob.sha256))
+            except FileNotFoundError:
+                pass
+            blob.delete()
+            deleted += 1
+
+    if deleted:
+        logger.info(f"🧹 Attachment GC deleted {deleted} unreferenced blobs")
+    return deleted
+
+
+@shared_task(ignore_result=True)
+def collect_attachment_blobs():
+    """Periodic (celery beat) garbage collection of the attachment store."""
+    return collect_garbage(settings.ATTACHMENT_GC_GRACE_SECONDS)
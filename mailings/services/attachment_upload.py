@@ -0,0 +1,146 @@
+# mailings/services/attachment_upload.py
+
+import os
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from mailings.services.attachment_store import StoredUpload, new_tmp_path
+
+logger = logging.getLogger(__name__)
+
+
+class AttachmentTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Attachments are too large."
+    default_code = "attachment_too_large"
+
+
+def check_file_size(size):
+    if size > settings.ATTACHMENT_MAX_FILE_BYTES:
+        raise AttachmentTooLarge(
+            f"An attachment exceeds the {settings.ATTACHMENT_MAX_FILE_BYTES} bytes per file limit."
+        )
+
+
+def check_campaign_size(total):
+    if total > settings.ATTACHMENT_MAX_CAMPAIGN_BYTES:
+        raise AttachmentTooLarge(
+            f"Attachments exceed the {settings.ATTACHMENT_MAX_CAMPAIGN_BYTES} bytes per campaign limit."
+        )
+
+
+def check_attachment_sizes(file_sizes):
+    """Raise AttachmentTooLarge if a file or all of them together exceed the caps."""
+    for size in file_sizes:
+        check_file_size(size)
+    check_campaign_size(sum(file_sizes))
+
+
+class AttachmentUploadHandler(FileUploadHandler):
+    """
+    Streams the files of one form field straight into the attachment
+    store's tmp dir, hashing and counting them as the chunks arrive, so an
+    upload is written once and never buffered in memory or in a second
+    temporary file. Each file becomes a StoredUpload.
+
+    The per-file and per-campaign caps are checked chunk by chunk: an
+    oversized upload is refused (413) as soon as it crosses a cap, and a
+    request whose declared length is already too big before a byte of it
+    is read. Files of other fields go to the next handlers.
+    """
+
+    def __init__(self, request=None, field_name="attachments"):
+        super().__init__(request)
+        self.attachment_field = field_name
+        self.activated = False
+        self.total_size = 0
+        # Not `file`: Django's parser closes handler.file on StopUpload, even when None
+        self.tmp_file = None
+        self.tmp_path = None
+        self.digest = None
+        self.file_size = 0
+        self.uploads = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # The form fields besides the files are bounded by DATA_UPLOAD_MAX_MEMORY_SIZE
+        allowance = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if allowance is not None and content_length:
+            check_campaign_size(content_length - allowance)
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.activated = field_name == self.attachment_field
+        if not self.activated:
+            return
+        self.tmp_path = new_tmp_path()
+        self.tmp_file = open(self.tmp_path, "w+b")
+        self.digest = hashlib.sha256()
+        self.file_size = 0
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activated:
+            return raw_data
+        self.file_size += len(raw_data)
+        self.total_size += len(raw_data)
+        try:
+            check_file_size(self.file_size)
+            check_campaign_size(self.total_size)
+        except AttachmentTooLarge:
+            self.discard()
+            raise
+        self.digest.update(raw_data)
+        self.tmp_file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.activated:
+            return None
+        self.tmp_file.seek(0)
+        upload = StoredUpload(
+            file=self.tmp_file,
+            tmp_path=self.tmp_path,
+            sha256=self.digest.hexdigest(),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+        self.uploads.append(upload)
+        self.tmp_file = None
+        self.activated = False
+        return upload
+
+    def upload_interrupted(self):
+        # The body ended inside a file: only that file is incomplete
+        self.discard_current()
+
+    def discard_current(self):
+        if self.tmp_file is not None:
+            self.tmp_file.close()
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+            self.tmp_file = None
+        self.activated = False
+
+    def discard(self):
+        """Delete every tmp file of this request: the file being received and the complete ones."""
+        self.discard_current()
+        for upload in self.uploads:
+            upload.close()
+        self.uploads = []
+
+
+def use_attachment_upload_handler(request, field_name="attachments"):
+    """
+    Route the files of `field_name` through AttachmentUploadHandler; must
+    run before the view first reads request.data or request.FILES.
+    """
+    request.upload_handlers = [AttachmentUploadHandler(request, field_name), *request.upload_handlers]
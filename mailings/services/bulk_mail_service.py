@@ -120,47 +120,391 @@
 
 # new updated============================
 import os
+import time
+import math
 import logging
+from datetime import timedelta
+from time import perf_counter
+from django.conf import settings
 from django.db import transaction
-from mailings.models import MailLog
-from mailings.services.email_sender import send_email
-from mailings.services.context_builder import build_email_context
-from celery import shared_task
+from django.utils import timezone
+from mailings.services.mail_log_buffer import MailLogBuffer
+from mailings.services.campaign_recipients import (
+    create_pending_logs,
+    claim_pending_logs,
+    iter_claimed_recipients,
+    release_claims,
+    fail_unsent_logs,
+    next_retry_at,
+    campaign_status_counts,
+)
+from mailings.services.email_sender import build_email_message, build_mime_parts
+from mailings.services.mime_cache import campaign_mime_parts
+from mailings.services.render_cache import RenderCache
+from mailings.services.attachment_store import acquire_blobs, release_blobs
+from mailings.services.smtp_pool import is_transient_smtp_error
+from mailings.services.relay_router import get_relay_router
+from mailings.services.rate_limiter import get_rate_limiter
+from mailings.services.async_engine import get_async_engine
+from mailings.services.context_builder import build_recipient_context
+from mailings.services.inline_image_service import load_inline_images
+from mailings.services.campaign_events import publish_campaign_progress
+from mailings.services.metrics import ATTACHMENT_BYTES, MESSAGES, TEMPLATE_RENDER_SECONDS
+from mailings.services.stage_profile import StageProfile, save_campaign_profile, stage
+from celery import shared_task, group, chord
 
-from client.models import Client
-from templates.models import MailType, EmailTemplate
-from mailings.models import SenderEmail
+from mailings.models import MailLog, Campaign
 
 logger = logging.getLogger(__name__)
 
+# How a campaign's messages go out:
+# - "pool":  batches over the per-process pool of blocking SMTP sessions
+# - "async": EMAIL_ASYNC_CONCURRENCY concurrent asyncio sessions per process
+DELIVERY_ENGINES = ("pool", "async")
+
 
 @shared_task(
     bind=True,
+    # Safe to retry the task as a whole: SENT rows are the checkpoint, so a
+    # rerun only claims recipients that have not been delivered yet
     autoretry_for=(Exception,),
     retry_kwargs={"max_retries": 5},
     retry_backoff=10,
     retry_jitter=True,
+    # Resumability: if the worker dies mid-task the message is redelivered,
+    # and the new run picks up the campaign's remaining PENDING rows
+    acks_late=True,
+    reject_on_worker_lost=True,
 )
-def send_bulk_mails(
-    self,
-    client_ids,
-    mail_type_id,
-    email_template_id,
-    sender_id,
-    subject,
-    message,
-    inline_images,
-    attachments,
-    user_id=None,         # NEW: Track who sent it
-    campaign_name=None,    # NEW: Track campaign name
-    dynamic_vars=None,   # 🔥 NEW
-):
-    clients = Client.objects.filter(id__in=client_ids, is_active=True)
-    mail_type = MailType.objects.get(id=mail_type_id)
-    email_template = EmailTemplate.objects.get(id=email_template_id)
-    sender = SenderEmail.objects.get(id=sender_id)
+def send_bulk_mails(self, campaign_id, inline_image_ids=None):
+    """
+    Worker for one campaign: keeps claiming batches of the campaign's
+    PENDING MailLog rows until every row has an outcome. Several of these
+    run in parallel for the same campaign (see dispatch_bulk_mails).
+
+    The task message only references data: the Campaign row holds subject,
+    message, variables and attachments, and inline images are loaded by
+    version id through the inline image cache.
+
+    Transient SMTP failures are retried per recipient: the row goes back
+    to PENDING with a backoff and the task re-runs itself for those rows
+    only, until BULK_MAIL_MAX_ATTEMPTS is reached. Recipients held back by
+    the shared sender/relay rate limits are rescheduled the same way,
+    without counting as an attempt.
+
+    The campaign's delivery_engine picks how messages go out (see
+    DELIVERY_ENGINES); the claiming, rendering and logging around it are
+    the same for both.
+    """
+    campaign = Campaign.objects.select_related('template', 'sender', 'mail_type').get(id=campaign_id)
+    campaign_key = campaign.task_id
+    email_template = campaign.template
+    sender = campaign.sender
+    subject = campaign.subject
+    message = campaign.message
+    dynamic_vars = campaign.dynamic_vars
+    attachments = campaign.attachments
+    delivery_engine = campaign.delivery_engine
+
+    # The janitor gave up on it (failed its recipients, released its attachments)
+    if campaign.status == Campaign.StatusChoices.EXPIRED:
+        logger.warning(f"⚠️ Campaign {campaign_key} expired before it was picked up, skipping")
+        return {"sent": 0, "failed": 0}
+
+    # Template and sender are SET_NULL: deleted after queueing, nothing can be sent
+    missing = [name for name, value in (("template", email_template), ("sender", sender)) if value is None]
+    if missing:
+        error = f"Campaign {' and '.join(missing)} deleted before sending"
+        failed = fail_unsent_logs(campaign_key, error)
+        logger.error(f"❌ Campaign {campaign_key}: {error}, {failed} recipients failed")
+        return {"sent": 0, "failed": failed}
+
+    inline_images = load_inline_images(image_ids=inline_image_ids or [])
+
+    # First worker run marks the start of the sending phase
+    started = Campaign.objects.filter(
+        id=campaign.id, started_at__isnull=True, status=Campaign.StatusChoices.QUEUED
+    ).update(
+        status=Campaign.StatusChoices.SENDING,
+        started_at=timezone.now(),
+    )
+    if started:
+        publish_campaign_progress(campaign.id, force=True)
+
+    sent = failed = deferred = 0
+    in_flight = set()  # claimed rows without an outcome yet
+    # Where this run's time goes, merged into Campaign.timing_profile at the end
+    profile = StageProfile()
+
+    # ✅ ENCODE INLINE IMAGES + ATTACHMENTS ONCE PER CAMPAIGN, NOT PER RECIPIENT
+    mime_parts = campaign_mime_parts.get_parts(
+        campaign_key,
+        lambda: build_mime_parts(inline_images, read_attachment_files(attachments)),
+    )
+
+    # ✅ RENDER EACH DISTINCT CONTEXT (BY THE KEYS THE TEMPLATE USES) ONCE
+    render_cache = RenderCache(
+        email_template.get_referenced_variables(),
+        max_bytes=settings.RENDER_CACHE_MAX_BYTES,
+    )
+
+    def render_template(context):
+        with TEMPLATE_RENDER_SECONDS.time():
+            return email_template.render_template(context)
+
+    outcome_counters = {
+        outcome: MESSAGES.labels(status=outcome, sender=sender.email, mail_type=campaign.mail_type.name)
+        for outcome in ("sent", "failed", "deferred")
+    }
+
+    # Outcomes are buffered and written with bulk_update, never inside the SMTP call
+    log_buffer = MailLogBuffer(batch_size=settings.MAIL_LOG_FLUSH_SIZE, campaign_id=campaign.id)
+
+    def log_result(log, error=None):
+        nonlocal sent, failed, deferred
+        in_flight.discard(log.id)
+        attempts = log.attempts + 1
+
+        if error is None:
+            log_buffer.add(log.id, MailLog.StatusChoices.SENT, attempts=attempts, claimed_at=log.claimed_at)
+            outcome_counters["sent"].inc()
+            sent += 1
+        elif is_transient_smtp_error(error) and attempts < settings.BULK_MAIL_MAX_ATTEMPTS:
+            delay = min(
+                settings.BULK_MAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1),
+                settings.BULK_MAIL_RETRY_BACKOFF_MAX_SECONDS,
+            )
+            log_buffer.add(
+                log.id,
+                MailLog.StatusChoices.PENDING,
+                str(error),
+                attempts=attempts,
+                next_attempt_at=timezone.now() + timedelta(seconds=delay),
+                claimed_at=log.claimed_at,
+            )
+            outcome_counters["deferred"].inc()
+            deferred += 1
+        else:
+            log_buffer.add(log.id, MailLog.StatusChoices.FAILED, str(error), attempts=attempts, claimed_at=log.claimed_at)
+            outcome_counters["failed"].inc()
+            failed += 1
+
+    # Messages are sent in batches over one pooled SMTP session of the
+    # relay the router picks for that batch
+    router = get_relay_router()
+    engine = None
+    if delivery_engine == "async":
+        # The engine's sessions stay on one relay for this run
+        engine_relay = router.pick()
+        engine = get_async_engine(engine_relay, router).start()
+    throttled_until = None
+    from_email = f"{sender.name} <{sender.email}>"
+    # Recipients whose rendered HTML is identical share one SMTP transaction
+    # (one DATA payload, many RCPT TO); the async engine sends one per recipient
+    max_rcpt = settings.EMAIL_MAX_RCPT_PER_TRANSACTION if engine is None else 1
+    batch = []          # (log, html)
+    batch_bodies = set()
+    # A full batch is EMAIL_SEND_BATCH_SIZE transactions
+    batch_limit = settings.EMAIL_SEND_BATCH_SIZE * max_rcpt
+
+    def build_transactions(entries):
+        """[(entries, email)]: one email per group of identical bodies, up to max_rcpt recipients."""
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry[1], []).append(entry)
+
+        transactions = []
+        for html, group in groups.items():
+            for start in range(0, len(group), max_rcpt):
+                chunk = group[start:start + max_rcpt]
+                try:
+                    if len(chunk) == 1:
+                        email = build_email_message(
+                            subject=subject,
+                            html_body=html,
+                            from_email=from_email,
+                            to_email=chunk[0][0].recipient.contact_email,
+                            mime_parts=mime_parts,
+                        )
+                    else:
+                        email = build_email_message(
+                            subject=subject,
+                            html_body=html,
+                            from_email=from_email,
+                            to_email=None,
+                            bcc=[log.recipient.contact_email for log, _ in chunk],
+                            mime_parts=mime_parts,
+                        )
+                except Exception as e:
+                    for log, _ in chunk:
+                        log_result(log, e)
+                    continue
+                transactions.append((chunk, email))
+        return transactions
+
+    def flush_batch():
+        nonlocal throttled_until
+        if not batch:
+            return
+
+        relay = engine_relay if engine is not None else router.pick()
+
+        # Only send what the shared sender/relay buckets allow right now
+        with stage("rate_limit"):
+            granted, wait = get_rate_limiter(sender, relay.host).acquire(len(batch))
+        if granted < len(batch):
+            throttled_until = timezone.now() + timedelta(seconds=max(1, wait))
+            for log, _ in batch[granted:]:
+                in_flight.discard(log.id)
+                log_buffer.add(
+                    log.id,
+                    MailLog.StatusChoices.PENDING,
+                    "Rate limited",
+                    attempts=log.attempts,
+                    next_attempt_at=throttled_until,
+                    claimed_at=log.claimed_at,
+                )
+            del batch[granted:]
+
+        with stage("mime"):
+            transactions = build_transactions(batch)
+        batch.clear()
+        batch_bodies.clear()
+        if not transactions:
+            return
+
+        if engine is not None:
+            # Blocks while the engine's queue is full (backpressure)
+            for [(log, _)], email in transactions:
+                engine.submit(log, email)
+            for log, error in engine.drain():
+                log_result(log, error)
+            return
+
+        emails = [email for _, email in transactions]
+        if max_rcpt > 1:
+            results = router.send_transactions(emails, relay=relay)
+        else:
+            results = [[error] for error in router.send_messages(emails, relay=relay)]
+        for (chunk, _), errors in zip(transactions, results):
+            for (log, _), error in zip(chunk, errors):
+                log_result(log, error)
+
+    def collect_deliveries():
+        # Wait for messages still on the wire of the async engine
+        if engine is not None:
+            for log, error in engine.join():
+                log_result(log, error)
+
+    def send_claimed_batches():
+        try:
+            claim_and_send()
+        finally:
+            # Record everything already handed to the engine before the
+            # claims are released, or those recipients would be sent twice
+            collect_deliveries()
+
+    def claim_and_send():
+        nonlocal throttled_until
+        throttled_until = None
+        while True:
+            with stage("claim"):
+                claimed_ids = claim_pending_logs(
+                    campaign_key,
+                    limit=settings.BULK_MAIL_CLAIM_SIZE,
+                    lease_seconds=settings.BULK_MAIL_CLAIM_LEASE_SECONDS,
+                )
+                # One claim is one chunk: the recipients come in one query
+                claimed = list(iter_claimed_recipients(claimed_ids, chunk_size=settings.BULK_MAIL_CLAIM_SIZE))
+            if not claimed_ids:
+                break
+            in_flight.update(claimed_ids)
+
+            for log in claimed:
+                recipient = log.recipient
+                try:
+                    if not log.is_active:
+                        raise ValueError("Client is inactive")
+
+                    started = perf_counter()
+                    context = build_recipient_context(recipient, sender, message, request_data=dynamic_vars)
+
+                    # 🔥 THIS IS REQUIRED (Inline Images Context)
+                    for cid in inline_images.keys():
+                        context[cid] = cid
+                    rendering = perf_counter()
+                    profile.add("context", rendering - started)
+
+                    html = render_cache.render(context, render_template)
+                    profile.add("render", perf_counter() - rendering)
+                except Exception as e:
+                    log_result(log, e)
+                    continue
 
-    results = []
+                batch.append((log, html))
+                batch_bodies.add(html)
+                if len(batch_bodies) >= settings.EMAIL_SEND_BATCH_SIZE or len(batch) >= batch_limit:
+                    flush_batch()
+                    if throttled_until:
+                        break
+
+            flush_batch()
+            log_buffer.flush()
+
+            if throttled_until:
+                # Out of tokens: park the rest of the claim until the buckets refill
+                collect_deliveries()
+                logger.info(f"⏳ Campaign {campaign_key}: rate limited until {throttled_until:%H:%M:%S}")
+                release_claims(in_flight, retry_at=throttled_until)
+                in_flight.clear()
+                return
+
+    try:
+        with profile.activate():
+            while True:
+                try:
+                    # Leaving the `with` flushes buffered logs, even if the loop raises
+                    with log_buffer:
+                        send_claimed_batches()
+                except Exception:
+                    # Hand undelivered claims back right away so the retry (or another
+                    # worker) picks them up instead of waiting for the claim lease
+                    release_claims(in_flight)
+                    raise
+
+                # Recipients waiting for a per-recipient retry, or still claimed by
+                # another run (which may have died with them: a redelivered task
+                # finds its own rows claimed until the lease expires): come back
+                # when they can be claimed. Only those rows are touched by the rerun.
+                retry_at = next_retry_at(
+                    campaign_key,
+                    lease_seconds=settings.BULK_MAIL_CLAIM_LEASE_SECONDS,
+                    poll_seconds=settings.BULK_MAIL_CLAIM_POLL_SECONDS,
+                )
+                if retry_at is None:
+                    break
+
+                countdown = max(1, (retry_at - timezone.now()).total_seconds())
+                logger.info(f"🔁 Campaign {campaign_key}: recipients left without an outcome ({deferred} deferred by this run), retrying in {countdown:.0f}s")
+                if self.request.is_eager:
+                    # No broker to reschedule on (tests, benchmarks): wait in place
+                    time.sleep(countdown)
+                    continue
+                raise self.retry(countdown=countdown, max_retries=None)
+    finally:
+        if engine is not None:
+            engine.close()
+        try:
+            save_campaign_profile(campaign.id, profile)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save the timing profile of campaign {campaign_key}: {e}")
+
+    render_stats = render_cache.stats()
+    logger.info(f"✅ Campaign {campaign_key}: {render_stats['renders']} renders for {render_stats['render_lookups']} recipients (dedup {render_stats['dedup_ratio']:.0%})")
+    return {"sent": sent, "failed": failed, **render_stats}
+
+
+def read_attachment_files(attachments):
     # ✅ READ FILE CONTENT ONCE, BEFORE LOOP
     file_contents = []
     for att in attachments:
@@ -172,84 +516,189 @@ def send_bulk_mails(
                 "content": file_content,
                 "content_type": att.get('content_type', 'application/octet-stream')
             })
+            ATTACHMENT_BYTES.labels(stage="read").inc(len(file_content))
             logger.info(f"✅ Read file: {att['filename']} ({len(file_content)} bytes)")
         except FileNotFoundError:
             logger.error(f"❌ File not found: {att['path']}")
             # Skip this attachment for all clients
             continue
+    return file_contents
+
+
+def cleanup_attachment_files(attachments):
+    # ✅ CLEANUP: Delete all temporary files after the campaign finishes
+    deleted_count = 0
+    for att in attachments:
+        file_path = att['path']
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                logger.info(f"✅ Deleted temp file: {file_path}")
+                deleted_count += 1
+            else:
+                logger.warning(f"⚠️ Temp file not found (already deleted?): {file_path}")
+        except Exception as e:
+            logger.error(f"❌ Error deleting {file_path}: {e}")
+
+    logger.info(f"🎯 Cleanup: Attempted to delete {len(attachments)} files, successfully deleted {deleted_count}")
+
+
+def release_attachment_files(attachments):
+    # Stored blobs may be shared with other campaigns: only drop this
+    # campaign's references, the attachment GC deletes unreferenced files
+    release_blobs([att['sha256'] for att in attachments if att.get('sha256')])
+    # Plain temp files (queued before the attachment store) are deleted as before
+    cleanup_attachment_files([att for att in attachments if not att.get('sha256')])
+
+
+def finish_campaign(campaign):
+    """
+    Mark the campaign FINISHED with its totals counted from its MailLog
+    rows, and return them (sent, failed, pending, total).
+    """
+    counts = campaign_status_counts(campaign.task_id)
+    totals = {
+        "sent": counts.get(MailLog.StatusChoices.SENT, 0),
+        "failed": counts.get(MailLog.StatusChoices.FAILED, 0),
+        "pending": counts.get(MailLog.StatusChoices.PENDING, 0)
+                   + counts.get(MailLog.StatusChoices.PROCESSING, 0),
+    }
+    totals["total"] = totals["sent"] + totals["failed"] + totals["pending"]
+
+    Campaign.objects.filter(id=campaign.id).update(
+        status=Campaign.StatusChoices.FINISHED,
+        finished_at=timezone.now(),
+        total_count=totals["total"],
+        sent_count=totals["sent"],
+        failed_count=totals["failed"],
+        pending_count=totals["pending"],
+    )
+    return totals
+
 
+@shared_task
+def summarize_bulk_mails(chunk_results, campaign_id):
+    """
+    Chord callback: runs once every worker of a campaign has finished
+    and reports the per-campaign totals from the campaign's MailLog rows
+    (so recipients handled by a crashed-then-resumed run are counted too).
+    The campaign's progress counters are reset to these totals, which
+    corrects any drift left by a worker that died mid-flush.
+    """
+    campaign = Campaign.objects.get(id=campaign_id)
+    campaign_mime_parts.discard(campaign.task_id)
+    if campaign.status == Campaign.StatusChoices.EXPIRED:
+        # The janitor already released the attachments and failed the recipients
+        logger.warning(f"⚠️ Campaign '{campaign.name}' had expired, nothing to summarize")
+        return {"campaign_name": campaign.name, "chunks": len(chunk_results), "expired": True,
+                "sent": campaign.sent_count, "failed": campaign.failed_count, "pending": 0,
+                "total": campaign.total_count, "render_dedup_ratio": 0.0}
+    release_attachment_files(campaign.attachments)
+
+    summary = {"campaign_name": campaign.name, "chunks": len(chunk_results), **finish_campaign(campaign)}
+    publish_campaign_progress(campaign.id, force=True)
+
+    # Render dedup over every worker of the campaign
+    lookups = sum(result.get("render_lookups", 0) for result in chunk_results if result)
+    renders = sum(result.get("renders", 0) for result in chunk_results if result)
+    summary["render_dedup_ratio"] = round(1 - renders / lookups, 4) if lookups else 0.0
+    logger.info(f"🎯 Campaign '{summary['campaign_name']}' finished: {summary}")
+    return summary
+
+
+@shared_task
+def abort_bulk_mails(request, exc, traceback, campaign_id):
+    """
+    Chord errback: a send_bulk_mails worker failed for good (retries
+    exhausted, task rejected), so Celery never runs summarize_bulk_mails.
+    Called once every worker of the campaign has returned; the recipients
+    still without an outcome are failed, and the campaign finishes with
+    its counters reset from the rows and its attachment references
+    released, as with summarize_bulk_mails.
+    """
+    with transaction.atomic():
+        campaign = Campaign.objects.select_for_update().get(id=campaign_id)
+        if campaign.status in Campaign.FINAL_STATUSES:
+            # Expired by the janitor (or already aborted): nothing is held any more
+            return
+        failed = fail_unsent_logs(campaign.task_id, f"Campaign aborted: {exc!r}")
+        totals = finish_campaign(campaign)
+        release_attachment_files(campaign.attachments)
+    campaign_mime_parts.discard(campaign.task_id)
+    publish_campaign_progress(campaign.id, force=True)
+    logger.error(f"❌ Campaign '{campaign.name}' aborted by a failed worker ({exc!r}): {failed} unsent recipients failed, {totals}")
+
+
+def dispatch_bulk_mails(
+    client_ids,
+    mail_type_id,
+    email_template_id,
+    sender_id,
+    subject,
+    attachments,
+    message="",
+    inline_image_ids=(),
+    dynamic_vars=None,
+    user_id=None,
+    campaign_name=None,
+    delivery_engine="pool",
+    chunk_size=None,
+):
+    """
+    Queue a campaign:
+    1. the campaign itself (subject, message, variables, attachment
+       references) is stored once as a Campaign row
+    2. every recipient becomes a PENDING MailLog row (bulk insert)
+    3. one send_bulk_mails worker per chunk_size recipients is started
+       as a Celery chord; the workers claim rows until none are left
+    4. summarize_bulk_mails reports the totals
+
+    Task messages only carry the campaign id and the inline image ids, so
+    their size does not depend on the recipient count, the message body or
+    the attachments. The campaign key (Campaign.task_id) doubles as the
+    chord callback id, so the id returned to the API caller finds both.
+
+    The campaign holds a reference on its stored attachments from here
+    until summarize_bulk_mails (or abort_bulk_mails, if a worker fails),
+    so retried workers still find the files.
+    """
+    chunk_size = chunk_size or settings.BULK_MAIL_CHUNK_SIZE
+    campaign = Campaign.objects.create(
+        name=campaign_name or "",
+        mail_type_id=mail_type_id,
+        template_id=email_template_id,
+        sender_id=sender_id,
+        created_by_id=user_id,
+        subject=subject,
+        message=message or "",
+        dynamic_vars=dynamic_vars or {},
+        attachments=attachments,
+        delivery_engine=delivery_engine,
+    )
+    blob_refs = [att['sha256'] for att in attachments if att.get('sha256')]
+    acquire_blobs(blob_refs)
     try:
-        for client in clients:
-            try:
-                with transaction.atomic():
-                    context = build_email_context(client, sender, message, request_data=dynamic_vars)
+        total = create_pending_logs(
+            campaign.task_id,
+            client_ids,
+            campaign=campaign,
+            mail_type_id=mail_type_id,
+            template_used_id=email_template_id, # Link Template
+            sender_email_id=sender_id,           # Link Sender
+            created_by_id=user_id,         # Link Admin User
+            campaign_name=campaign.name, # Store campaign
+            subject=subject,
+        )
+        Campaign.objects.filter(id=campaign.id).update(total_count=total, pending_count=total)
 
-                    # 🔥 THIS IS REQUIRED (Inline Images Context)
-                    for cid in inline_images.keys():
-                        context[cid] = cid
+        header = group(
+            send_bulk_mails.s(campaign_id=campaign.id, inline_image_ids=list(inline_image_ids))
+            for _ in range(max(1, math.ceil(total / chunk_size)))
+        )
+        callback = summarize_bulk_mails.s(campaign_id=campaign.id).set(task_id=campaign.task_id)
+        callback.on_error(abort_bulk_mails.s(campaign_id=campaign.id))
 
-                    html = email_template.render_template(context)
-                    
-                
-                    client_attachments_data=file_contents.copy()
-
-                    # SEND EMAIL
-                    send_email(
-                        subject=subject,
-                        html_body=html,
-                        from_email=f"{sender.name} <{sender.email}>",
-                        to_email=client.contact_email,
-                        inline_images=inline_images,
-                        attachments=client_attachments_data
-                    )
-
-                    # --- CREATE LOG ENTRY (Updated) ---
-                    MailLog.objects.create(
-                        client=client,
-                        mail_type=mail_type,
-                        template_used=email_template, # Link Template
-                        sender_email=sender,           # Link Sender
-                        created_by_id=user_id,         # Link Admin User
-                        task_id=self.request.id,       # Link Celery Task
-                        campaign_name=campaign_name or "", # Store campaign
-                        subject=subject,
-                        status="SENT",
-                        error_message=''
-                    )
-
-                    results.append({"client": client.id, "status": "sent"})
-
-            except Exception as e:
-                # This runs ONLY if atomic block fails
-                MailLog.objects.create(
-                    client=client,
-                    mail_type=mail_type,
-                    template_used=email_template,
-                    sender_email=sender,
-                    created_by_id=user_id,
-                    task_id=self.request.id,
-                    campaign_name=campaign_name or "",
-                    subject=subject,
-                    status="FAILED",
-                    error_message=str(e)
-                )
-                results.append(
-                    {"client": client.id, "status": "failed", "error": str(e)}
-                )
-    finally:
-        # ✅ CLEANUP: Delete all temporary files after the loop finishes
-        deleted_count = 0
-        for att in attachments:
-            file_path = att['path']
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"✅ Deleted temp file: {file_path}")
-                    deleted_count += 1
-                else:
-                    logger.warning(f"⚠️ Temp file not found (already deleted?): {file_path}")
-            except Exception as e:
-                logger.error(f"❌ Error deleting {file_path}: {e}")
-        
-        logger.info(f"🎯 Cleanup: Attempted to delete {len(attachments)} files, successfully deleted {deleted_count}")
-    return results
\ No newline at end of file
+        return chord(header)(callback)
+    except Exception:
+        release_blobs(blob_refs)
+        raise
@@ -0,0 +1,188 @@
+# mailings/services/campaign_events.py
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PATTERN = "campaign:*:progress"
+STREAM_TOKEN_SALT = "mailings.campaign-events"
+
+
+def campaign_channel(campaign_id):
+    return f"campaign:{campaign_id}:progress"
+
+
+def campaign_progress(campaign):
+    """The progress event of a campaign: same fields as the status API."""
+    from mailings.serializers import CampaignStatusSerializer
+
+    return dict(CampaignStatusSerializer(campaign).data)
+
+
+# --- stream tokens ---
+# Browsers' EventSource cannot set headers, so the stream is opened with a
+# token in the query string. It ends up in proxy logs and browser history:
+# it only opens the progress stream of one campaign, for
+# CAMPAIGN_EVENTS_TOKEN_SECONDS, never the API access token itself.
+
+def make_stream_token(campaign_id, user_id):
+    return signing.dumps({"campaign": campaign_id, "user": user_id}, salt=STREAM_TOKEN_SALT)
+
+
+def read_stream_token(token, campaign_id):
+    """The user id a stream token was issued to, or None if invalid, expired or for another campaign."""
+    try:
+        payload = signing.loads(token, salt=STREAM_TOKEN_SALT, max_age=settings.CAMPAIGN_EVENTS_TOKEN_SECONDS)
+    except signing.BadSignature:
+        return None
+    if payload.get("campaign") != campaign_id:
+        return None
+    return payload.get("user")
+
+
+# --- publishing (workers, sync) ---
+
+_client = None
+_client_lock = threading.Lock()
+_last_published = {}  # campaign id -> monotonic time, per process
+
+
+def get_redis_client():
+    """Shared sync Redis client, or None without REDIS_URL."""
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            import redis
+
+            _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def publish_campaign_progress(campaign_id, force=False):
+    """
+    Push the current progress of a campaign to its viewers. Calls within
+    CAMPAIGN_EVENTS_PUBLISH_INTERVAL_SECONDS of the previous event of
+    this process are dropped unless forced (phase changes always go out).
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+
+    now = time.monotonic()
+    last = _last_published.get(campaign_id)
+    if not force and last is not None and now - last < settings.CAMPAIGN_EVENTS_PUBLISH_INTERVAL_SECONDS:
+        return
+    _last_published[campaign_id] = now
+
+    from mailings.models import Campaign
+
+    try:
+        campaign = Campaign.objects.get(id=campaign_id)
+        if campaign.status in Campaign.FINAL_STATUSES:
+            _last_published.pop(campaign_id, None)
+        client.publish(campaign_channel(campaign_id), json.dumps(campaign_progress(campaign)))
+    except Exception as e:
+        # Progress events are best effort: never fail a send over them
+        logger.warning(f"⚠️ Could not publish progress of campaign {campaign_id}: {e}")
+
+
+# --- subscribing (ASGI, async) ---
+
+class CampaignEventHub:
+    """
+    One Redis pub/sub connection per process, shared by every open event
+    stream: it pattern-subscribes to all campaign channels once and fans
+    each event out to the queues of the viewers of that campaign. N
+    viewers cost one subscription, not N.
+
+    Viewers only need the latest snapshot, so a viewer that falls behind
+    loses older events rather than holding memory.
+    """
+
+    QUEUE_SIZE = 8
+    RECONNECT_SECONDS = 2.0
+
+    def __init__(self, url):
+        self.url = url
+        self._viewers = {}  # channel -> set of asyncio.Queue
+        self._reader = None
+
+    def subscribe(self, campaign_id):
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._viewers.setdefault(campaign_channel(campaign_id), set()).add(queue)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read())
+        return queue
+
+    def unsubscribe(self, campaign_id, queue):
+        channel = campaign_channel(campaign_id)
+        viewers = self._viewers.get(channel)
+        if viewers is not None:
+            viewers.discard(queue)
+            if not viewers:
+                del self._viewers[channel]
+
+    def _dispatch(self, channel, data):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        for queue in self._viewers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _read(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(CHANNEL_PATTERN)
+                logger.info("📡 Campaign event hub subscribed")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "pmessage":
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        self._dispatch(channel, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Campaign event hub lost Redis ({e}), reconnecting")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+
+
+# --- PER-PROCESS HUB (one per event loop: a hub's reader task lives on it) ---
+_hub = None
+_hub_key = None
+
+
+def get_campaign_event_hub():
+    """The hub of this process and event loop, or None without REDIS_URL."""
+    global _hub, _hub_key
+    if not settings.REDIS_URL:
+        return None
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _hub is None or _hub_key != key:
+        _hub = CampaignEventHub(settings.REDIS_URL)
+        _hub_key = key
+    return _hub
@@ -0,0 +1,191 @@
+# mailings/services/campaign_recipients.py
+
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from mailings.models import MailLog
+from mailings.services.context_builder import Recipient
+
+logger = logging.getLogger(__name__)
+
+Status = MailLog.StatusChoices
+
+ClaimedRecipient = namedtuple("ClaimedRecipient", ["id", "attempts", "claimed_at", "is_active", "recipient"])
+
+# Projection of MailLog -> Client -> User read by the send loop, one JOIN
+CLAIMED_RECIPIENT_FIELDS = (
+    'id',
+    'attempts',
+    'claimed_at',
+    'client__is_active',
+    'client__user__username',
+    'client__company_name',
+    'client__contact_email',
+)
+
+
+def create_pending_logs(campaign_key, client_ids, batch_size=1000, **log_fields):
+    """
+    Materialize every recipient of a campaign up front as a PENDING
+    MailLog row. The rows are the campaign's work queue: workers claim
+    them, so a redelivered task resumes instead of starting over.
+    """
+    rows = (
+        MailLog(client_id=client_id, task_id=campaign_key, status=Status.PENDING, **log_fields)
+        for client_id in client_ids
+    )
+    created = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            MailLog.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        MailLog.objects.bulk_create(batch)
+        created += len(batch)
+
+    logger.info(f"✅ Queued {created} recipients for campaign {campaign_key}")
+    return created
+
+
+def claim_pending_logs(campaign_key, limit, lease_seconds):
+    """
+    Atomically move up to `limit` rows PENDING -> PROCESSING and return
+    their ids. PENDING rows waiting for a retry are skipped until their
+    next_attempt_at. Rows stuck in PROCESSING longer than the lease (their
+    worker crashed or was redeployed) are claimable again.
+
+    The conditional UPDATE is what makes the claim safe: a row another
+    worker already took no longer matches, and only rows stamped with our
+    own claimed_at are returned.
+    """
+    now = timezone.now()
+    claimable = Q(status=Status.PENDING) & (
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    ) | Q(
+        status=Status.PROCESSING,
+        claimed_at__lt=now - timedelta(seconds=lease_seconds),
+    )
+
+    with transaction.atomic():
+        candidate_ids = list(
+            MailLog.objects
+            .select_for_update(skip_locked=True)
+            .filter(claimable, task_id=campaign_key)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not candidate_ids:
+            return []
+
+        MailLog.objects.filter(claimable, id__in=candidate_ids).update(
+            status=Status.PROCESSING,
+            claimed_at=now,
+        )
+
+    return list(
+        MailLog.objects
+        .filter(id__in=candidate_ids, status=Status.PROCESSING, claimed_at=now)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def iter_claimed_recipients(log_ids, chunk_size=2000):
+    """
+    Stream the recipients behind claimed MailLog rows as light tuples.
+
+    Only the columns the template context needs are selected, joined to
+    Client and User in the same query, and rows are fetched through
+    iterator() (a server-side cursor on PostgreSQL): no model instances,
+    no per-recipient query for client.user, no queryset result cache.
+    """
+    rows = (
+        MailLog.objects
+        .filter(id__in=log_ids)
+        .order_by('id')
+        .values_list(*CLAIMED_RECIPIENT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for log_id, attempts, claimed_at, is_active, username, company_name, contact_email in rows:
+        yield ClaimedRecipient(
+            id=log_id,
+            attempts=attempts,
+            claimed_at=claimed_at,
+            is_active=is_active,
+            recipient=Recipient(username, company_name, contact_email),
+        )
+
+
+def release_claims(log_ids, retry_at=None):
+    """
+    Hand claimed rows that have no outcome yet back to PENDING, so a
+    retried or parallel worker can take them without waiting for the lease.
+    With retry_at they are only claimable again from that time on.
+    """
+    if not log_ids:
+        return 0
+    return MailLog.objects.filter(id__in=log_ids, status=Status.PROCESSING).update(
+        status=Status.PENDING,
+        claimed_at=None,
+        next_attempt_at=retry_at,
+    )
+
+
+def fail_unsent_logs(campaign_key, error_message):
+    """
+    Fail every row of a campaign still waiting for an outcome (PENDING or
+    PROCESSING): no worker will send them any more. Returns how many.
+    """
+    return MailLog.objects.filter(
+        task_id=campaign_key,
+        status__in=[Status.PENDING, Status.PROCESSING],
+    ).update(status=Status.FAILED, error_message=error_message, next_attempt_at=None)
+
+
+def next_retry_at(campaign_key, lease_seconds, poll_seconds):
+    """
+    When a worker that found nothing to claim should look again, or None
+    once every row of the campaign has an outcome:
+    - PENDING rows: when the earliest is due (now if one is not waiting)
+    - PROCESSING rows claimed by another run: when their lease expires, in
+      case that run died, but no later than poll_seconds from now, since
+      a live run usually finishes them well before
+    """
+    now = timezone.now()
+    waiting = (
+        MailLog.objects
+        .filter(task_id=campaign_key, status__in=[Status.PENDING, Status.PROCESSING])
+        .aggregate(
+            pending=Count('id', filter=Q(status=Status.PENDING)),
+            pending_at=Min('next_attempt_at', filter=Q(status=Status.PENDING)),
+            claimed_at=Min('claimed_at', filter=Q(status=Status.PROCESSING)),
+        )
+    )
+    times = []
+    if waiting['pending']:
+        times.append(waiting['pending_at'] or now)
+    if waiting['claimed_at'] is not None:
+        times.append(min(
+            waiting['claimed_at'] + timedelta(seconds=lease_seconds),
+            now + timedelta(seconds=poll_seconds),
+        ))
+    return min(times, default=None)
+
+
+def campaign_status_counts(campaign_key):
+    """{status: count} for one campaign (uses the task_id/status index)."""
+    return dict(
+        MailLog.objects
+        .filter(task_id=campaign_key)
+        .values_list('status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
@@ -1,11 +1,27 @@
+from collections import namedtuple
 from datetime import datetime
+
+# The only client fields a template can reference. The bulk send path
+# builds these straight from a values_list() row, without model instances.
+Recipient = namedtuple("Recipient", ["client_name", "company_name", "contact_email"])
+
+
 def build_email_context(client, sender, message, request_data=None):
+    recipient = Recipient(
+        client_name=client.user.username,
+        company_name=client.company_name,
+        contact_email=client.contact_email,
+    )
+    return build_recipient_context(recipient, sender, message, request_data)
+
+
+def build_recipient_context(recipient, sender, message, request_data=None):
     request_data = request_data or {}
 
     context = {
-        "client_name": client.user.username,
-        "company_name": client.company_name,
-        "contact_email": client.contact_email,
+        "client_name": recipient.client_name,
+        "company_name": recipient.company_name,
+        "contact_email": recipient.contact_email,
         "message": message,
         "sender_name": sender.name,
         "sender_email": sender.email,
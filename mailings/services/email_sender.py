@@ -1,11 +1,234 @@
 from django.core.mail import EmailMultiAlternatives
+from email import encoders
+from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
+from email.mime.text import MIMEText
+from email.generator import BytesGenerator
+from io import BytesIO
+import copy
+import uuid
 import logging
 
+from mailings.services.relay_router import get_relay_router
+from mailings.services.metrics import MIME_BUILD_SECONDS
+
 logger = logging.getLogger(__name__)
 
 
-def send_email(
+def build_inline_image_part(cid, filename, file_bytes):
+    """Encode one inline (CID) image as a ready-to-attach MIME part."""
+    # Determine the subtype based on filename extension
+    if filename.lower().endswith('.png'):
+        subtype = 'png'
+    elif filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
+        subtype = 'jpeg'
+    else:
+        # fallback or default
+        subtype = 'png'  # or handle differently
+
+    image = MIMEImage(file_bytes, _subtype=subtype)
+    image.add_header("Content-ID", f"<{cid}>")
+    image.add_header(
+        "Content-Disposition",
+        "inline",
+        filename=filename,
+    )
+    return image
+
+
+def build_attachment_part(attachment):
+    """
+    Encode one attachment (UploadedFile/file-like or dict) as a MIME part.
+    Returns None for unsupported attachment types.
+    """
+    # UploadedFile or file-like
+    if hasattr(attachment, "read") and hasattr(attachment, "name"):
+        attachment.seek(0)
+        content = attachment.read()
+        filename = attachment.name
+        content_type = getattr(
+            attachment,
+            "content_type",
+            "application/octet-stream",
+        )
+
+    # dict-based attachment
+    elif isinstance(attachment, dict):
+        content = attachment["content"]
+        filename = attachment["filename"]
+        content_type = attachment.get(
+            "content_type",
+            "application/octet-stream",
+        )
+    else:
+        logger.warning(
+            "Unsupported attachment type: %s",
+            type(attachment),
+        )
+        return None
+
+    # Same rules as EmailMessage.attach: UTF-8 text stays text, anything
+    # else (including undecodable "text") is sent base64-encoded
+    maintype, _, subtype = content_type.partition("/")
+    if maintype == "text" and isinstance(content, bytes):
+        try:
+            content = content.decode()
+        except UnicodeDecodeError:
+            maintype, subtype = "application", "octet-stream"
+
+    if maintype == "text":
+        part = MIMEText(content, subtype or "plain", "utf-8")
+    else:
+        part = MIMEBase(maintype, subtype or "octet-stream")
+        part.set_payload(content.encode() if isinstance(content, str) else content)
+        encoders.encode_base64(part)
+
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        filename = ("utf-8", "", filename)
+    part.add_header("Content-Disposition", "attachment", filename=filename)
+    return part
+
+
+class PreEncodedPart:
+    """
+    A MIME part serialized to bytes exactly once.
+
+    Messages carry a tiny placeholder copy of the part (same headers,
+    payload = unique token); SplicedEmailMessage swaps the token for the
+    pre-serialized body when the message is turned into bytes. A 5 MB
+    attachment is therefore base64-encoded and line-wrapped once per
+    campaign instead of once per recipient.
+    """
+
+    def __init__(self, part):
+        self.token = f"mime-part-{uuid.uuid4().hex}"
+        fp = BytesIO()
+        BytesGenerator(fp, mangle_from_=False).flatten(part, linesep="\n")
+        raw = fp.getvalue()
+        self.body = raw.split(b"\n\n", 1)[1]
+        self._body_crlf = None
+
+        self.placeholder = copy.copy(part)
+        self.placeholder.set_payload(self.token)
+
+    def body_for(self, linesep):
+        if linesep == "\r\n":
+            if self._body_crlf is None:
+                self._body_crlf = self.body.replace(b"\n", b"\r\n")
+            return self._body_crlf
+        return self.body
+
+
+class SplicedMessage:
+    """
+    Wraps the email.message object built by Django and splices the
+    pre-encoded part bodies in on serialization. Everything else is
+    delegated, so every Django mail backend can send it unchanged.
+    """
+
+    def __init__(self, message, parts):
+        self._message = message
+        self._parts = parts
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+    # Dunder lookups bypass __getattr__: header access is delegated explicitly
+    def __getitem__(self, name):
+        return self._message[name]
+
+    def __setitem__(self, name, value):
+        self._message[name] = value
+
+    def __delitem__(self, name):
+        del self._message[name]
+
+    def __contains__(self, name):
+        return name in self._message
+
+    def get(self, name, failobj=None):
+        return self._message.get(name, failobj)
+
+    def items(self):
+        return self._message.items()
+
+    def as_bytes(self, unixfrom=False, linesep="\n"):
+        raw = self._message.as_bytes(unixfrom=unixfrom, linesep=linesep)
+        for part in self._parts:
+            raw = raw.replace(part.token.encode("ascii"), part.body_for(linesep), 1)
+        return raw
+
+    def as_string(self, unixfrom=False, linesep="\n"):
+        raw = self._message.as_string(unixfrom=unixfrom, linesep=linesep)
+        for part in self._parts:
+            raw = raw.replace(part.token, part.body_for(linesep).decode("utf-8"), 1)
+        return raw
+
+    def __bytes__(self):
+        return self.as_bytes()
+
+    def __str__(self):
+        return self.as_string()
+
+
+class SplicedEmailMessage(EmailMultiAlternatives):
+    """EmailMultiAlternatives that accepts PreEncodedPart attachments."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spliced_parts = []
+
+    def attach(self, filename=None, content=None, mimetype=None):
+        if isinstance(filename, PreEncodedPart):
+            self.spliced_parts.append(filename)
+            return super().attach(filename.placeholder)
+        return super().attach(filename, content, mimetype)
+
+    def message(self):
+        msg = super().message()
+        if not self.to and not self.cc and self.bcc:
+            # One transaction for many recipients: nobody is listed by name
+            msg["To"] = "undisclosed-recipients:;"
+        if self.spliced_parts:
+            return SplicedMessage(msg, self.spliced_parts)
+        return msg
+
+
+@MIME_BUILD_SECONDS.labels(part="campaign").time()
+def build_mime_parts(inline_images=None, attachments=None):
+    """
+    Encode inline images and attachments once. The returned parts are
+    never modified afterwards, so one list can be spliced into any
+    number of messages.
+    """
+    parts = []
+
+    # ---- INLINE IMAGES ----
+    for cid, (filename, file_bytes) in (inline_images or {}).items():
+        try:
+            parts.append(PreEncodedPart(build_inline_image_part(cid, filename, file_bytes)))
+        except Exception as e:
+            logger.warning(
+                "Failed to attach inline image %s: %s",
+                cid,
+                e,
+            )
+
+    # ---- ATTACHMENTS ----
+    for attachment in attachments or []:
+        try:
+            part = build_attachment_part(attachment)
+            if part is not None:
+                parts.append(PreEncodedPart(part))
+        except Exception as e:
+            logger.warning("Failed to attach file: %s", e)
+
+    return parts
+
+
+def build_email_message(
     *,
     subject,
     html_body,
@@ -14,13 +237,19 @@ def send_email(
     inline_images=None,
     attachments=None,
     plain_text=None,
+    mime_parts=None,
+    bcc=None,
 ):
     """
-    Correct Django-compatible email sender.
+    Build (but do not send) a Django-compatible email.
     Supports:
     - HTML
     - inline images (CID)
     - attachments
+    - mime_parts: parts pre-encoded with build_mime_parts(); when given,
+      inline_images and attachments are ignored
+    - bcc: envelope-only recipients; with to_email=None the message is
+      one transaction for all of them (To: undisclosed-recipients)
     """
 
     if not plain_text:
@@ -29,11 +258,12 @@ def send_email(
     if isinstance(to_email, str):
         to_email = [to_email]
 
-    email = EmailMultiAlternatives(
+    email = SplicedEmailMessage(
         subject=subject,
         body=plain_text,
         from_email=from_email,
         to=to_email,
+        bcc=bcc,
     )
 
     # IMPORTANT: Keep multipart/mixed (default)
@@ -42,73 +272,43 @@ def send_email(
     # Attach HTML
     email.attach_alternative(html_body, "text/html")
 
-    # ---- INLINE IMAGES ----
-    if inline_images:
-        for cid, (filename, file_bytes) in inline_images.items():
-            try:
-                # Determine the subtype based on filename extension
-                if filename.lower().endswith('.png'):
-                    subtype = 'png'
-                elif filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
-                    subtype = 'jpeg'
-                else:
-                    # fallback or default
-                    subtype = 'png'  # or handle differently
-
-                image = MIMEImage(file_bytes, _subtype=subtype)
-                # image = MIMEImage(file_bytes)
-                image.add_header("Content-ID", f"<{cid}>")
-                image.add_header(
-                    "Content-Disposition",
-                    "inline",
-                    filename=filename,
-                )
-                email.attach(image)
-            except Exception as e:
-                logger.warning(
-                    "Failed to attach inline image %s: %s",
-                    cid,
-                    e,
-                )
+    if mime_parts is None:
+        mime_parts = build_mime_parts(inline_images, attachments)
 
-    # ---- ATTACHMENTS ----
-    if attachments:
-        for attachment in attachments:
-            try:
-                # UploadedFile or file-like
-                if hasattr(attachment, "read") and hasattr(attachment, "name"):
-                    attachment.seek(0)
-                    content = attachment.read()
-                    filename = attachment.name
-                    content_type = getattr(
-                        attachment,
-                        "content_type",
-                        "application/octet-stream",
-                    )
-
-                # dict-based attachment
-                elif isinstance(attachment, dict):
-                    content = attachment["content"]
-                    filename = attachment["filename"]
-                    content_type = attachment.get(
-                        "content_type",
-                        "application/octet-stream",
-                    )
-                else:
-                    logger.warning(
-                        "Unsupported attachment type: %s",
-                        type(attachment),
-                    )
-                    continue
-
-                email.attach(
-                    filename=filename,
-                    content=content,
-                    mimetype=content_type,
-                )
-            except Exception as e:
-                logger.warning("Failed to attach file: %s", e)
-
-    email.send(fail_silently=False)
-    logger.info("Email sent to %s", to_email)
+    for part in mime_parts:
+        email.attach(part)
+
+    return email
+
+
+def send_email(
+    *,
+    subject,
+    html_body,
+    from_email,
+    to_email,
+    inline_images=None,
+    attachments=None,
+    plain_text=None,
+):
+    """
+    Build a single email and send it over a pooled SMTP connection of the
+    healthiest relay, so repeated calls do not pay a new TCP + STARTTLS +
+    AUTH handshake.
+    """
+    email = build_email_message(
+        subject=subject,
+        html_body=html_body,
+        from_email=from_email,
+        to_email=to_email,
+        inline_images=inline_images,
+        attachments=attachments,
+        plain_text=plain_text,
+    )
+
+    [error] = get_relay_router().send_messages([email])
+    if error is not None:
+        raise error
+
+    logger.info("Email sent to %s", email.to)
     return True
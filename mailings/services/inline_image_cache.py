@@ -0,0 +1,156 @@
+# mailings/services/inline_image_cache.py
+
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from mailings.services.metrics import INLINE_IMAGE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class InlineImageCache:
+    """
+    Two-tier cache of inline image bytes keyed by (public_id, version).
+
+    - memory: per-process LRU, bounded by memory_bytes
+    - disk: shared by every worker on the host, bounded by disk_bytes,
+      least recently read files are evicted first (reads touch the mtime)
+
+    A given (public_id, version) never changes content, so entries never
+    go stale: a new InlineImage version simply has a new key. invalidate()
+    frees the space of superseded versions early.
+    """
+
+    def __init__(self, directory, memory_bytes=64 * 1024 * 1024, disk_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+    # --- keys ---
+
+    @staticmethod
+    def _prefix(public_id):
+        return hashlib.sha256(public_id.encode()).hexdigest()[:32]
+
+    def _path(self, public_id, version):
+        return os.path.join(self.directory, f"{self._prefix(public_id)}-v{version}")
+
+    # --- lookups ---
+
+    def get(self, public_id, version):
+        key = (public_id, version)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                INLINE_IMAGE_CACHE_LOOKUPS.labels(result="memory").inc()
+                return data
+
+        path = self._path(public_id, version)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            INLINE_IMAGE_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        except OSError as e:
+            logger.warning(f"⚠️ Inline image disk cache read failed: {e}")
+            INLINE_IMAGE_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        INLINE_IMAGE_CACHE_LOOKUPS.labels(result="disk").inc()
+        self._remember(key, data)
+        return data
+
+    def put(self, public_id, version, data):
+        self._remember((public_id, version), data)
+
+        path = self._path(public_id, version)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+        except OSError as e:
+            # The disk tier is an optimization: keep serving from memory
+            logger.warning(f"⚠️ Inline image disk cache write failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def invalidate(self, public_id, version=None):
+        """Drop one version of an image, or all of its versions when version is None."""
+        with self._lock:
+            for key in list(self._memory):
+                if key[0] == public_id and (version is None or key[1] == version):
+                    self._memory_used -= len(self._memory.pop(key))
+
+        prefix = f"{self._prefix(public_id)}-v"
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith(prefix) and (version is None or name == f"{prefix}{version}"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+
+    # --- bounds ---
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= len(old)
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _trim_disk(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.disk_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.disk_bytes:
+                break
+
+
+inline_images = InlineImageCache(
+    directory=settings.INLINE_IMAGE_CACHE_DIR,
+    memory_bytes=settings.INLINE_IMAGE_CACHE_MEMORY_BYTES,
+    disk_bytes=settings.INLINE_IMAGE_CACHE_DISK_BYTES,
+)
@@ -1,36 +1,180 @@
 # mailings/services/inline_image_service.py
 
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
 from templates.models import InlineImage
+from mailings.services.inline_image_cache import inline_images
+
+logger = logging.getLogger(__name__)
 
+# Worth retrying: the CDN or the network hiccuped, not a missing image
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
-def load_inline_images(mail_type):
+
+class InlineImageFetchError(Exception):
     """
-    Load active inline images from Cloudinary and return:
-    {
-        content_id: (filename, bytes)
-    }
+    Some inline images could not be downloaded. `failures` maps
+    content_id -> error message; `images` holds the ones that loaded.
     """
-    images = {}
 
-    qs = InlineImage.objects.filter(
+    def __init__(self, failures, images):
+        self.failures = failures
+        self.images = images
+        super().__init__(
+            "Failed to load inline images: "
+            + ", ".join(f"{cid} ({error})" for cid, error in failures.items())
+        )
+
+
+# --- SHARED KEEP-ALIVE SESSION (per process, like the SMTP pool) ---
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """requests.Session reused across calls, so repeat fetches skip the TLS handshake."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.INLINE_IMAGE_FETCH_WORKERS,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def inline_image_key(img):
+    """(public_id, version): identifies the bytes of one InlineImage version."""
+    return (img.public_id or img.image.public_id, img.version)
+
+
+def inline_image_url(img):
+    # ORIGINAL (non-transformed) image URL
+    return img.image.build_url(secure=True)
+
+
+def fetch_image(session, url, *, retries, backoff, timeout):
+    """
+    GET one image. Connection errors, timeouts and 429/5xx replies are
+    retried with exponential backoff; other HTTP errors fail at once.
+    """
+    attempt = 0
+    while True:
+        try:
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+        except requests.RequestException as e:
+            retryable = (
+                isinstance(e, (requests.ConnectionError, requests.Timeout))
+                or (e.response is not None and e.response.status_code in RETRY_STATUS_CODES)
+            )
+            if not retryable or attempt >= retries:
+                raise
+            delay = backoff * 2 ** attempt
+            attempt += 1
+            logger.warning(f"⚠️ Inline image fetch failed ({e}), retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def active_inline_images(mail_type):
+    return InlineImage.objects.filter(
         mail_type=mail_type,
         is_active=True
     ).order_by('display_order')
 
+
+def fetch_inline_images(mail_type=None, *, image_ids=None, session=None, url_for=inline_image_url):
+    """
+    Load the active inline images of a mail type, or exactly the
+    InlineImage versions in image_ids (active or not: a campaign keeps the
+    versions it was queued with), as
+    ({content_id: (filename, bytes)}, {content_id: error message}).
+
+    Cached images (see InlineImageCache) are used as is; misses are
+    downloaded concurrently, INLINE_IMAGE_FETCH_WORKERS at a time, over
+    one keep-alive session. `session` and `url_for` can be swapped, e.g.
+    to point the fetch at a local HTTP server.
+    """
+    images = {}
+    failures = {}
+    misses = []
+
+    if image_ids is not None:
+        qs = InlineImage.objects.filter(id__in=image_ids).order_by('display_order')
+    else:
+        qs = active_inline_images(mail_type)
+
     for img in qs:
         if not img.image:
             continue
 
-        # Build ORIGINAL (non-transformed) image URL
-        url = img.image.build_url(secure=True)
-
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-
         # Guess filename
         filename = f"{img.content_id}.png"
 
-        images[img.content_id] = (filename, response.content)
+        public_id, version = inline_image_key(img)
+        content = inline_images.get(public_id, version)
+        if content is None:
+            misses.append(img)
+        # Placeholder keeps display_order; filled in once downloaded
+        images[img.content_id] = (filename, content)
+
+    if misses:
+        session = session or get_http_session()
 
+        def fetch(img):
+            return fetch_image(
+                session,
+                url_for(img),
+                retries=settings.INLINE_IMAGE_FETCH_RETRIES,
+                backoff=settings.INLINE_IMAGE_FETCH_BACKOFF_SECONDS,
+                timeout=settings.INLINE_IMAGE_FETCH_TIMEOUT_SECONDS,
+            )
+
+        workers = min(settings.INLINE_IMAGE_FETCH_WORKERS, len(misses))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inline-image") as executor:
+            futures = [(img, executor.submit(fetch, img)) for img in misses]
+            for img, future in futures:
+                try:
+                    content = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Inline image {img.content_id} could not be downloaded: {e}")
+                    failures[img.content_id] = str(e)
+                    del images[img.content_id]
+                    continue
+                inline_images.put(*inline_image_key(img), content)
+                images[img.content_id] = (images[img.content_id][0], content)
+
+        logger.info(f"✅ Inline images: {len(images)} loaded, {len(misses)} downloaded, {len(failures)} failed")
+
+    return images, failures
+
+
+def load_inline_images(mail_type=None, **kwargs):
+    """
+    Load active inline images and return:
+    {
+        content_id: (filename, bytes)
+    }
+    Raises InlineImageFetchError listing every image that could not be
+    downloaded (a campaign must not go out with broken CID references).
+    """
+    images, failures = fetch_inline_images(mail_type, **kwargs)
+    if failures:
+        raise InlineImageFetchError(failures, images)
     return images
@@ -0,0 +1,104 @@
+# mailings/services/mail_log_buffer.py
+
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from mailings.models import Campaign, MailLog
+from mailings.services.campaign_events import publish_campaign_progress
+from mailings.services.stage_profile import stage
+
+logger = logging.getLogger(__name__)
+
+
+class MailLogBuffer:
+    """
+    Collects per-recipient send outcomes in memory and writes them back
+    to the campaign's pre-created MailLog rows with one bulk_update per
+    batch, instead of one query (and one transaction) per recipient.
+
+    Use it as a context manager: whatever is still buffered is flushed on
+    exit, including when the send loop raises, so no outcome is lost.
+
+    With a campaign_id, each flush also moves the campaign's progress
+    counters, in the same transaction as the rows they count.
+
+    Only rows this worker still holds are written: PROCESSING with the
+    claimed_at stamp of its claim. A worker that outlived its claim lease
+    finds its rows re-claimed by another one; those outcomes are dropped
+    (the other worker reports them), so nothing is overwritten or counted
+    twice.
+    """
+
+    UPDATE_FIELDS = ['status', 'error_message', 'sent_at', 'attempts', 'next_attempt_at']
+
+    def __init__(self, batch_size=200, campaign_id=None):
+        self.batch_size = batch_size
+        self.campaign_id = campaign_id
+        self._pending = []
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, log_id, status, error_message='', attempts=1, next_attempt_at=None, claimed_at=None):
+        row = MailLog(
+            id=log_id,
+            status=status,
+            error_message=error_message,
+            sent_at=timezone.now(),
+            attempts=attempts,
+            next_attempt_at=next_attempt_at,
+        )
+        # The claim the outcome belongs to, checked at flush time
+        row.claimed_at = claimed_at
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with stage("log_write"), transaction.atomic():
+            # Lock the rows still held by their claim, so no re-claim slips in before the write
+            held = set(
+                MailLog.objects.select_for_update()
+                .filter(id__in=[row.id for row in rows], status=MailLog.StatusChoices.PROCESSING)
+                .values_list('id', 'claimed_at')
+            )
+            owned = [row for row in rows if (row.id, row.claimed_at) in held]
+            if len(owned) < len(rows):
+                self.dropped += len(rows) - len(owned)
+                logger.warning(
+                    f"⚠️ {len(rows) - len(owned)} outcomes dropped: their rows were re-claimed after the lease expired"
+                )
+            rows = owned
+            sent = sum(1 for row in rows if row.status == MailLog.StatusChoices.SENT)
+            failed = sum(1 for row in rows if row.status == MailLog.StatusChoices.FAILED)
+            MailLog.objects.bulk_update(rows, self.UPDATE_FIELDS, batch_size=self.batch_size)
+            if self.campaign_id is not None and (sent or failed):
+                # Deferred retries stay pending: only final outcomes move the counters
+                Campaign.objects.filter(id=self.campaign_id).update(
+                    sent_count=F('sent_count') + sent,
+                    failed_count=F('failed_count') + failed,
+                    pending_count=Greatest(F('pending_count') - (sent + failed), 0),
+                    last_progress_at=timezone.now(),
+                )
+        self.written += len(rows)
+        if self.campaign_id is not None and (sent or failed):
+            publish_campaign_progress(self.campaign_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        except Exception:
+            # Do not mask the original error of the send loop
+            if exc_type is None:
+                raise
+            logger.exception("❌ Failed to flush buffered mail logs")
+        return False
@@ -0,0 +1,133 @@
+# mailings/services/metrics.py
+
+import os
+import shutil
+import logging
+
+from django.conf import settings
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+logger = logging.getLogger(__name__)
+
+# Under gunicorn and celery prefork, PROMETHEUS_MULTIPROC_DIR is set before
+# this module is imported (see gunicorn.conf.py and the celery app): every
+# process then writes its samples to files there, aggregated on scrape.
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+NETWORK_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+SMTP_CONNECT_SECONDS = Histogram(
+    "mail_smtp_connect_seconds",
+    "Time to open an SMTP session (connect, EHLO, TLS, login)",
+    ["relay"],
+    buckets=NETWORK_BUCKETS,
+)
+SMTP_SEND_SECONDS = Histogram(
+    "mail_smtp_send_seconds",
+    "Time to send one SMTP transaction on an open session",
+    ["relay"],
+    buckets=NETWORK_BUCKETS,
+)
+TEMPLATE_RENDER_SECONDS = Histogram(
+    "mail_template_render_seconds",
+    "Time to render one email body (render cache misses only)",
+    buckets=FAST_BUCKETS,
+)
+MIME_BUILD_SECONDS = Histogram(
+    "mail_mime_build_seconds",
+    "Time to build MIME: shared campaign parts, or one message around them",
+    ["part"],
+    buckets=FAST_BUCKETS,
+)
+MESSAGES = Counter(
+    "mail_messages",
+    "Recipients by send outcome (deferred = transient failure, retried later)",
+    ["status", "sender", "mail_type"],
+)
+INLINE_IMAGE_CACHE_LOOKUPS = Counter(
+    "mail_inline_image_cache_lookups",
+    "Inline image cache lookups by result: memory or disk hit, or miss",
+    ["result"],
+)
+ATTACHMENT_BYTES = Counter(
+    "mail_attachment_bytes",
+    "Attachment bytes processed: uploaded into the store, or read for sending",
+    ["stage"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce an API response (until the first byte for streams)",
+    ["method", "route", "status"],
+    buckets=NETWORK_BUCKETS,
+)
+
+
+class QueueDepthCollector(Collector):
+    """Tasks waiting in the Celery broker (Redis lists), read at scrape time."""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from mailings.services.campaign_events import get_redis_client
+
+        depth = GaugeMetricFamily(
+            "mail_queue_depth",
+            "Tasks waiting in the Celery broker queue",
+            labels=["queue"],
+        )
+        client = get_redis_client()
+        if client is not None:
+            try:
+                for queue in settings.METRICS_CELERY_QUEUES:
+                    depth.add_metric([queue], client.llen(queue))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read the broker queue depth: {e}")
+        yield depth
+
+
+_queue_depth = QueueDepthCollector()
+REGISTRY.register(_queue_depth)
+
+
+def multiprocess_mode():
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry():
+    """The registry to expose: samples of every process in multiprocess mode."""
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_queue_depth)
+    return registry
+
+
+def reset_multiprocess_dir():
+    """Drop the sample files of a previous run (call before forking workers)."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def mark_process_dead(pid):
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(pid)
+
+
+def start_worker_exporter(port):
+    """Serve the metrics of a Celery worker and its pool processes on `port`."""
+    reset_multiprocess_dir()
+    start_http_server(port, registry=metrics_registry())
+    logger.info(f"📈 Worker metrics exporter listening on :{port}")
@@ -0,0 +1,57 @@
+# mailings/services/mime_cache.py
+
+import threading
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignMimeCache:
+    """
+    Campaign-level cache of pre-encoded MIME parts (inline images and
+    attachments). Every chunk of a campaign that runs in this process
+    shares one encoded copy; each per-recipient message only references
+    the parts, so the base64 work no longer scales with the recipient count.
+
+    Kept small on purpose: entries hold whole attachments in memory.
+    """
+
+    def __init__(self, max_campaigns=4):
+        self.max_campaigns = max_campaigns
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_parts(self, campaign_key, build):
+        """
+        Return the encoded parts for a campaign; build() is only called
+        (e.g. to read attachment files and encode them) on a miss.
+        """
+        if campaign_key is None:
+            return build()
+
+        with self._lock:
+            parts = self._entries.get(campaign_key)
+            if parts is not None:
+                self._entries.move_to_end(campaign_key)
+                return parts
+
+        parts = build()
+        logger.info(f"✅ Encoded {len(parts)} MIME parts for campaign {campaign_key}")
+
+        with self._lock:
+            self._entries[campaign_key] = parts
+            while len(self._entries) > self.max_campaigns:
+                self._entries.popitem(last=False)
+        return parts
+
+    def discard(self, campaign_key):
+        with self._lock:
+            self._entries.pop(campaign_key, None)
+
+
+campaign_mime_parts = CampaignMimeCache(
+    max_campaigns=settings.MIME_CACHE_MAX_CAMPAIGNS
+)
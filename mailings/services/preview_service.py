@@ -38,23 +38,29 @@ from django.template import Context
 from django.template.loader import render_to_string
 from templates.models import MailType, InlineImage
 
-def render_preview_html(mail_type_id, context_data):
+def render_preview_html(mail_type, context_data, inline_images=None):
     """
     Renders the email HTML and replaces CID (email-only) links
     with public Cloudinary URLs so they render in a browser/API response.
+
+    mail_type is a MailType (loaded with select_related('template') to
+    save a query) or its id; pass inline_images when the caller already
+    has the mail type's active images.
     """
     # 1. Get Mail Type
-    mail_type = MailType.objects.get(id=mail_type_id)
+    if not isinstance(mail_type, MailType):
+        mail_type = MailType.objects.select_related('template').get(id=mail_type)
     
     # 2. Render the HTML using the context
     html_content = mail_type.template.render_template(context_data)
 
     # 3. Handle Inline Images
     # We must MIRROR the logic in inline_image_service.py (filter is_active, order by display_order)
-    inline_images = InlineImage.objects.filter(
-        mail_type=mail_type, 
-        is_active=True
-    ).order_by('display_order')
+    if inline_images is None:
+        inline_images = InlineImage.objects.filter(
+            mail_type=mail_type, 
+            is_active=True
+        ).order_by('display_order')
     
     for img in inline_images:
         # Skip if no image file exists
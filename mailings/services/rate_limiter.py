@@ -0,0 +1,122 @@
+# mailings/services/rate_limiter.py
+
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Atomically take up to ARGV[1] tokens from every bucket in KEYS.
+# Per bucket ARGV carries (capacity, refill rate in tokens per ms).
+# Tokens are granted all-or-nothing across buckets: the grant is the
+# smallest amount every bucket can give. Returns {granted, wait_ms}, where
+# wait_ms is how long until each bucket holds at least one more token.
+# The clock is Redis' own, so workers on different hosts agree on it.
+TOKEN_BUCKET_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local requested = tonumber(ARGV[1])
+local granted = requested
+local levels = {}
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    granted = math.min(granted, math.floor(tokens))
+end
+
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local tokens = levels[i] - granted
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+    if granted < requested and tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+end
+
+return {granted, wait}
+"""
+
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+_client = None
+_script = None
+_client_lock = threading.Lock()
+
+
+def get_redis_script():
+    """Registered token-bucket script on the shared Redis, or None without REDIS_URL."""
+    global _client, _script
+    if not settings.REDIS_URL:
+        return None
+    with _client_lock:
+        if _script is None:
+            import redis
+
+            _client = redis.Redis.from_url(settings.REDIS_URL)
+            _script = _client.register_script(TOKEN_BUCKET_LUA)
+    return _script
+
+
+class SendRateLimiter:
+    """
+    Token buckets shared by every worker through Redis: one per limit of
+    the SenderEmail (per minute / per day) and of the SMTP relay host.
+    A send may only go out once every bucket gave a token, so the caps
+    hold for the whole fleet, not per worker.
+
+    Without REDIS_URL, or without any configured limit, every request is
+    granted in full.
+    """
+
+    def __init__(self, buckets, script=None):
+        # buckets: [(redis key, limit, period in ms)]
+        self.buckets = [b for b in buckets if b[1]]
+        self.script = script
+
+    def acquire(self, count):
+        """
+        Take up to `count` send tokens. Returns (granted, wait_seconds):
+        granted may be lower than count, and wait_seconds is how long until
+        the next token is available when it is.
+        """
+        if count <= 0 or not self.buckets or self.script is None:
+            return count, 0.0
+
+        keys = [key for key, _, _ in self.buckets]
+        args = [count]
+        for _, limit, period_ms in self.buckets:
+            args += [limit, limit / period_ms]
+
+        try:
+            granted, wait_ms = self.script(keys=keys, args=args)
+        except Exception as e:
+            # Fail open: a Redis outage must not stop delivery altogether
+            logger.warning(f"⚠️ Rate limiter unavailable, sending unthrottled: {e}")
+            return count, 0.0
+
+        return int(granted), int(wait_ms) / 1000
+
+
+def get_rate_limiter(sender, relay_host=None):
+    """Limiter for one sender over one relay host (EMAIL_HOST by default)."""
+    relay_host = relay_host or settings.EMAIL_HOST
+    buckets = [
+        (f"ratelimit:sender:{sender.pk}:minute", sender.rate_limit_per_minute, MINUTE_MS),
+        (f"ratelimit:sender:{sender.pk}:day", sender.rate_limit_per_day, DAY_MS),
+        (f"ratelimit:relay:{relay_host}:minute", settings.EMAIL_RELAY_RATE_LIMIT_PER_MINUTE, MINUTE_MS),
+        (f"ratelimit:relay:{relay_host}:day", settings.EMAIL_RELAY_RATE_LIMIT_PER_DAY, DAY_MS),
+    ]
+    if not any(limit for _, limit, _ in buckets):
+        return SendRateLimiter([])
+    return SendRateLimiter(buckets, script=get_redis_script())
@@ -0,0 +1,282 @@
+# mailings/services/relay_router.py
+
+import os
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from mailings.services.smtp_pool import (
+    SMTPConnectionPool,
+    get_smtp_pool,
+    is_transient_smtp_error,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RelayHealth:
+    """
+    Exponentially weighted moving averages of per-message latency and of
+    the relay error rate. Only errors that say something about the relay
+    (dropped sessions, 4xx throttling) count; a refused mailbox does not.
+    """
+
+    # Latency (seconds per message) at which the speed factor halves
+    LATENCY_REFERENCE = 0.5
+    # Floor of the score: a degraded relay still gets a trickle of traffic,
+    # so its recovery is noticed
+    MIN_SCORE = 0.02
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def record(self, latency, error_ratio):
+        if self.samples == 0:
+            self.latency, self.error_rate = latency, error_ratio
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+            self.error_rate += self.alpha * (error_ratio - self.error_rate)
+        self.samples += 1
+
+    def score(self):
+        success = 1.0 - self.error_rate
+        speed = self.LATENCY_REFERENCE / (self.LATENCY_REFERENCE + self.latency)
+        return max(self.MIN_SCORE, success * success * speed)
+
+
+class Relay:
+    """A configured relay at runtime: its settings, SMTP pool and health."""
+
+    def __init__(self, key, name, host, weight, pool, config=None, async_kwargs=None, alpha=0.2):
+        self.key = key
+        self.name = name
+        self.host = host
+        self.weight = weight
+        self.pool = pool
+        self.config = config
+        self.async_kwargs = async_kwargs
+        self.health = RelayHealth(alpha=alpha)
+
+    def effective_weight(self):
+        return self.weight * self.health.score()
+
+    def __repr__(self):
+        return f"<Relay {self.name} w={self.weight} score={self.health.score():.2f}>"
+
+
+class RelayRouter:
+    """
+    Routes each batch of messages to one of the active SMTPRelay rows,
+    picked at random in proportion to weight x health score, so traffic
+    drains away from a relay whose latency or error rate climbs and comes
+    back once it recovers.
+
+    The relay table is re-read every `refresh_interval` seconds: relays
+    added, removed or edited in the admin are picked up without restarting
+    workers (an edited relay gets a fresh pool, health is kept). With no
+    active rows, everything goes through the EMAIL_HOST settings.
+
+    With `relays` given, the router only ever uses those (benchmarks
+    against a local sink) and never reads the table.
+    """
+
+    def __init__(self, refresh_interval=30, health_alpha=0.2, relays=None):
+        self.refresh_interval = refresh_interval
+        self.health_alpha = health_alpha
+        self._relays = {relay.key: relay for relay in relays or ()}
+        self._static = relays is not None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    # --- relay table ---
+
+    def relays(self):
+        if self._static:
+            return list(self._relays.values())
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.refresh_interval:
+            self.reload()
+        return list(self._relays.values())
+
+    def reload(self):
+        from mailings.models import SMTPRelay
+
+        rows = list(SMTPRelay.objects.filter(is_active=True, weight__gt=0).order_by('id'))
+        with self._lock:
+            old, relays = self._relays, {}
+            for row in rows:
+                config = (row.host, row.port, row.username, row.get_password(),
+                          row.use_tls, row.use_ssl, row.max_connections)
+                relay = old.pop(row.pk, None)
+                if relay is not None and relay.config != config:
+                    # Settings changed: new pool, keep the health history
+                    stale, relay = relay, self._relay_from_row(row, config)
+                    relay.health = stale.health
+                    old[row.pk] = stale
+                elif relay is None:
+                    relay = self._relay_from_row(row, config)
+                relay.name, relay.weight = row.name, row.weight
+                relays[row.pk] = relay
+
+            if not relays:
+                default = old.pop("default", None) or self._default_relay()
+                relays["default"] = default
+
+            self._relays = relays
+            self._loaded_at = time.monotonic()
+
+        for relay in old.values():
+            logger.info(f"🔌 SMTP relay {relay.name} removed or changed, closing its pool")
+            if relay.key != "default":
+                relay.pool.close_all()
+
+    def _relay_from_row(self, row, config):
+        password = config[3]
+        pool = SMTPConnectionPool(
+            max_connections=row.max_connections,
+            max_messages_per_connection=settings.EMAIL_POOL_MAX_MESSAGES_PER_CONNECTION,
+            keepalive_interval=settings.EMAIL_POOL_KEEPALIVE_SECONDS,
+            max_idle=settings.EMAIL_POOL_MAX_IDLE_SECONDS,
+            connection_kwargs={
+                "host": row.host,
+                "port": row.port,
+                "username": row.username,
+                "password": password,
+                "use_tls": row.use_tls,
+                "use_ssl": row.use_ssl,
+            },
+        )
+        async_kwargs = {
+            "hostname": row.host,
+            "port": row.port,
+            "username": row.username or None,
+            "password": password or None,
+            "use_tls": row.use_ssl,
+            "start_tls": row.use_tls,
+        }
+        return Relay(row.pk, row.name, row.host, row.weight, pool,
+                     config=config, async_kwargs=async_kwargs, alpha=self.health_alpha)
+
+    def _default_relay(self):
+        # The EMAIL_* settings, through the existing per-process pool
+        return Relay("default", "default", settings.EMAIL_HOST, 1, get_smtp_pool(),
+                     alpha=self.health_alpha)
+
+    # --- routing ---
+
+    def pick(self, exclude=()):
+        candidates = [r for r in self.relays() if r.key not in exclude]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        with self._lock:
+            weights = [r.effective_weight() for r in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def record(self, relay, elapsed, messages, errors):
+        relay_errors = sum(1 for e in errors if e is not None and is_transient_smtp_error(e))
+        with self._lock:
+            relay.health.record(elapsed / max(1, messages), relay_errors / max(1, messages))
+
+    def send_messages(self, messages, relay=None):
+        """
+        Send a batch through one relay and return per-message errors
+        (None = sent). If the relay cannot even open a session, the batch
+        fails over to the next relay picked among those not tried yet.
+        """
+        if not messages:
+            return []
+        errors = self._route(lambda pool: pool.send_messages(messages), relay)
+        if isinstance(errors, Exception):
+            return [errors] * len(messages)
+        return errors
+
+    def send_transactions(self, messages, relay=None):
+        """
+        Multi-recipient counterpart of send_messages: per message, a list
+        of per-recipient errors (see PooledConnection.send_transactions).
+        """
+        if not messages:
+            return []
+        results = self._route(lambda pool: pool.send_transactions(messages), relay, per_recipient=True)
+        if isinstance(results, Exception):
+            return [[results] * len(message.recipients()) for message in messages]
+        return results
+
+    def _route(self, send, relay=None, per_recipient=False):
+        # Returns send()'s result, or the last error if no relay could take the batch
+        relay = relay or self.pick()
+        tried = set()
+        while True:
+            tried.add(relay.key)
+            started = time.monotonic()
+            try:
+                results = send(relay.pool)
+            except Exception as e:
+                # Could not open a session: the relay is down for this batch
+                self.record(relay, time.monotonic() - started, 1, [e])
+                fallback = self.pick(exclude=tried)
+                if fallback is None:
+                    return e
+                logger.warning(f"⚠️ SMTP relay {relay.name} failed ({e}), failing over to {fallback.name}")
+                relay = fallback
+                continue
+            errors = [e for errs in results for e in errs] if per_recipient else results
+            self.record(relay, time.monotonic() - started, len(errors), errors)
+            return results
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "relay": relay.name,
+                    "host": relay.host,
+                    "weight": relay.weight,
+                    "latency": relay.health.latency,
+                    "error_rate": relay.health.error_rate,
+                    "score": relay.health.score(),
+                }
+                for relay in self._relays.values()
+            ]
+
+
+# --- PER-PROCESS ROUTER (same fork rule as the SMTP pool) ---
+_router = None
+_router_pid = None
+_router_lock = threading.Lock()
+
+
+def get_relay_router():
+    global _router, _router_pid
+    pid = os.getpid()
+    if _router is None or _router_pid != pid:
+        with _router_lock:
+            if _router is None or _router_pid != pid:
+                _router = RelayRouter(
+                    refresh_interval=settings.SMTP_RELAY_REFRESH_SECONDS,
+                    health_alpha=settings.SMTP_RELAY_HEALTH_ALPHA,
+                )
+                _router_pid = pid
+    return _router
+
+
+@contextmanager
+def use_relay_router(router):
+    """Route every send of this process through `router` inside the block."""
+    global _router, _router_pid
+    with _router_lock:
+        previous = _router, _router_pid
+        _router, _router_pid = router, os.getpid()
+    try:
+        yield router
+    finally:
+        with _router_lock:
+            _router, _router_pid = previous
@@ -0,0 +1,80 @@
+# mailings/services/render_cache.py
+
+import sys
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    Renders each distinct recipient context of a campaign once.
+
+    The key is a fingerprint of only the context keys the template
+    actually references (see EmailTemplate.get_referenced_variables): a
+    template that personalizes on company_name alone renders once per
+    company, not once per contact. When the referenced keys are unknown,
+    every recipient is rendered.
+
+    Bounded by memory: bodies are evicted least-recently-used once their
+    total size passes max_bytes.
+    """
+
+    def __init__(self, referenced_names, max_bytes=32 * 1024 * 1024):
+        self.names = sorted(referenced_names) if referenced_names is not None else None
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.lookups = 0
+        self.renders = 0
+
+    def fingerprint(self, context):
+        if self.names is None:
+            return None
+        items = tuple((name, context.get(name)) for name in self.names)
+        try:
+            hash(items)
+        except TypeError:
+            # Unhashable dynamic vars (lists, dicts from the request)
+            return repr(items)
+        return items
+
+    def render(self, context, render):
+        self.lookups += 1
+        key = self.fingerprint(context)
+        if key is None:
+            self.renders += 1
+            return render(context)
+
+        html = self._entries.get(key)
+        if html is not None:
+            self._entries.move_to_end(key)
+            return html
+
+        html = render(context)
+        self.renders += 1
+        size = sys.getsizeof(html)
+        if size <= self.max_bytes:
+            self._entries[key] = html
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+        return html
+
+    @property
+    def dedup_ratio(self):
+        """Share of recipients served without rendering (0.0 - 1.0)."""
+        if not self.lookups:
+            return 0.0
+        return 1 - self.renders / self.lookups
+
+    def stats(self):
+        return {
+            "render_lookups": self.lookups,
+            "renders": self.renders,
+            "dedup_ratio": round(self.dedup_ratio, 4),
+            "cached_bodies": len(self._entries),
+            "cached_bytes": self.bytes,
+        }
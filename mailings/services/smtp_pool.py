@@ -0,0 +1,319 @@
+# mailings/services/smtp_pool.py
+
+import os
+import smtplib
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.message import sanitize_address
+
+from mailings.services.metrics import MIME_BUILD_SECONDS, SMTP_CONNECT_SECONDS, SMTP_SEND_SECONDS
+from mailings.services.stage_profile import stage
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the SMTP session can no longer be trusted and must be reopened
+DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def is_transient_smtp_error(error):
+    """
+    True when retrying the same message later may succeed: dropped or
+    refused connections and 4xx replies (greylisting, rate limits,
+    mailbox busy). 5xx replies and anything else are permanent.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, DISCONNECT_ERRORS + (OSError,))
+
+
+def pipelined_sendmail(connection, from_addr, to_addrs, msg):
+    """
+    smtplib.SMTP.sendmail, except that when the server advertises
+    PIPELINING (RFC 2920) MAIL FROM and every RCPT TO go out in one write
+    and their replies are read afterwards: one round trip for the whole
+    envelope instead of one per recipient. Returns the refused recipients
+    as {address: (code, reply)}, like sendmail().
+    """
+    connection.ehlo_or_helo_if_needed()
+    if not connection.has_extn("pipelining"):
+        return connection.sendmail(from_addr, to_addrs, msg)
+
+    mail_options = f" size={len(msg)}" if connection.has_extn("size") else ""
+    commands = [f"mail FROM:{smtplib.quoteaddr(from_addr)}{mail_options}"]
+    commands += [f"rcpt TO:{smtplib.quoteaddr(addr)}" for addr in to_addrs]
+    connection.send("".join(f"{command}\r\n" for command in commands))
+
+    # A reply comes back for every command of the group, even after a failure
+    mail_code, mail_reply = connection.getreply()
+    refused = {}
+    for addr in to_addrs:
+        code, reply = connection.getreply()
+        if code not in (250, 251):
+            refused[addr] = (code, reply)
+
+    if mail_code != 250:
+        connection.rset()
+        raise smtplib.SMTPSenderRefused(mail_code, mail_reply, from_addr)
+    if len(refused) == len(to_addrs):
+        connection.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, reply = connection.data(msg)
+    if code != 250:
+        connection.rset()
+        raise smtplib.SMTPDataError(code, reply)
+    return refused
+
+
+class PooledConnection:
+    """
+    One open SMTP session (a Django EmailBackend) plus the bookkeeping
+    the pool needs to decide when to recycle it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.relay = getattr(backend, 'host', '') or ''
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def open(self):
+        with stage("smtp_connect", SMTP_CONNECT_SECONDS.labels(relay=self.relay)):
+            self.backend.open()
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception as e:
+            logger.warning("Error while closing SMTP connection: %s", e)
+
+    def reconnect(self):
+        self.close()
+        self.open()
+
+    def is_alive(self):
+        """Probe the session with NOOP; any failure means it is gone."""
+        if not self.backend.connection:
+            return False
+        try:
+            code, _ = self.backend.connection.noop()
+            return code == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send_messages(self, messages, max_messages=None):
+        """
+        Send each message over this session and return a list with one
+        entry per message: None on success, the exception on failure.
+        A dropped session is reopened transparently and the message retried once.
+        """
+        results = []
+        for message in messages:
+            if max_messages and self.messages_sent >= max_messages:
+                self.reconnect()
+            try:
+                try:
+                    self._send_message(message)
+                except DISCONNECT_ERRORS:
+                    logger.info("SMTP connection dropped, reconnecting")
+                    self.reconnect()
+                    self._send_message(message)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+            self.messages_sent += 1
+            self.last_used = time.monotonic()
+        return results
+
+    def send_transactions(self, messages, max_messages=None):
+        """
+        Send each message as one SMTP transaction to all of its recipients
+        (one DATA payload, many RCPT TO). Returns, per message, a list with
+        one entry per recipient in message.recipients() order: None when
+        the recipient was accepted, the exception otherwise.
+        """
+        results = []
+        for message in messages:
+            if max_messages and self.messages_sent >= max_messages:
+                self.reconnect()
+            try:
+                try:
+                    results.append(self._send_transaction(message))
+                except DISCONNECT_ERRORS:
+                    logger.info("SMTP connection dropped, reconnecting")
+                    self.reconnect()
+                    results.append(self._send_transaction(message))
+            except smtplib.SMTPRecipientsRefused as e:
+                results.append([
+                    smtplib.SMTPRecipientsRefused({addr: reply})
+                    for addr, reply in e.recipients.items()
+                ])
+            except Exception as e:
+                results.append([e] * len(message.recipients()))
+            self.messages_sent += 1
+            self.last_used = time.monotonic()
+        return results
+
+    def _send_message(self, message):
+        if self.backend.connection is None:
+            self.open()
+        with stage("smtp", SMTP_SEND_SECONDS.labels(relay=self.relay)):
+            self.backend.send_messages([message])
+
+    def _send_transaction(self, message):
+        if self.backend.connection is None:
+            self.open()
+        encoding = message.encoding or settings.DEFAULT_CHARSET
+        from_email = sanitize_address(message.from_email, encoding)
+        recipients = [sanitize_address(addr, encoding) for addr in message.recipients()]
+        with stage("mime", MIME_BUILD_SECONDS.labels(part="message")):
+            payload = message.message().as_bytes(linesep="\r\n")
+
+        with stage("smtp", SMTP_SEND_SECONDS.labels(relay=self.relay)):
+            refused = pipelined_sendmail(self.backend.connection, from_email, recipients, payload)
+        return [
+            smtplib.SMTPRecipientsRefused({addr: refused[addr]}) if addr in refused else None
+            for addr in recipients
+        ]
+
+
+class SMTPConnectionPool:
+    """
+    Per-process pool of open SMTP sessions.
+
+    - max_connections: sessions that may be open at the same time
+    - max_messages_per_connection: recycle a session after this many messages
+    - keepalive_interval: idle sessions older than this are probed with NOOP
+    - max_idle: idle sessions older than this are closed instead of reused
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections=2,
+        max_messages_per_connection=100,
+        keepalive_interval=30,
+        max_idle=240,
+        connection_kwargs=None,
+    ):
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.connection_kwargs = connection_kwargs or {}
+
+        self._idle = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def _new_connection(self):
+        backend = get_connection(fail_silently=False, **self.connection_kwargs)
+        conn = PooledConnection(backend)
+        conn.open()
+        return conn
+
+    def _checkout(self):
+        with self._cond:
+            while not self._idle and self._in_use >= self.max_connections:
+                self._cond.wait()
+            conn = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            if conn is not None:
+                idle_for = time.monotonic() - conn.last_used
+                if idle_for > self.max_idle:
+                    conn.close()
+                    conn = None
+                elif idle_for > self.keepalive_interval and not conn.is_alive():
+                    logger.info("Idle SMTP connection failed NOOP, replacing it")
+                    conn.close()
+                    conn = None
+            if conn is None:
+                conn = self._new_connection()
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, conn, broken=False):
+        if broken or conn.messages_sent >= self.max_messages_per_connection:
+            conn.close()
+            conn = None
+        with self._cond:
+            self._in_use -= 1
+            if conn is not None:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+        except DISCONNECT_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._checkin(conn, broken=broken)
+
+    def send_messages(self, messages):
+        """Send a batch over one pooled session; returns per-message errors (None = sent)."""
+        if not messages:
+            return []
+        with self.connection() as conn:
+            return conn.send_messages(
+                messages, max_messages=self.max_messages_per_connection
+            )
+
+    def send_transactions(self, messages):
+        """Multi-recipient counterpart of send_messages (see PooledConnection)."""
+        if not messages:
+            return []
+        with self.connection() as conn:
+            return conn.send_transactions(
+                messages, max_messages=self.max_messages_per_connection
+            )
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# --- PER-PROCESS POOL ---
+# Celery prefork children inherit module state from the parent, so the pool
+# is keyed on the pid and rebuilt after a fork instead of sharing sockets.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = SMTPConnectionPool(
+                    max_connections=settings.EMAIL_POOL_MAX_CONNECTIONS,
+                    max_messages_per_connection=settings.EMAIL_POOL_MAX_MESSAGES_PER_CONNECTION,
+                    keepalive_interval=settings.EMAIL_POOL_KEEPALIVE_SECONDS,
+                    max_idle=settings.EMAIL_POOL_MAX_IDLE_SECONDS,
+                )
+                _pool_pid = pid
+    return _pool
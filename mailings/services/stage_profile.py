@@ -0,0 +1,167 @@
+# mailings/services/stage_profile.py
+
+import math
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import transaction
+
+from mailings.models import Campaign
+
+logger = logging.getLogger(__name__)
+
+_current_profile = ContextVar("stage_profile", default=None)
+
+
+class StageHistogram:
+    """
+    Durations of one stage in logarithmic buckets: bucket i holds the
+    durations in [GAMMA**i, GAMMA**(i+1)) seconds, so quantiles are off by
+    at most GAMMA (5%) whatever the scale. Bucket counts simply add up,
+    which makes histograms of different workers mergeable.
+    """
+
+    GAMMA = 1.1
+    MIN_SECONDS = 1e-7
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        index = math.floor(math.log(max(seconds, self.MIN_SECONDS), self.GAMMA))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Geometric middle of the bucket, never above the real max
+                return min(self.GAMMA ** (index + 0.5), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.max = data.get("max", 0.0)
+        histogram.buckets = {int(index): count for index, count in data.get("buckets", {}).items()}
+        return histogram
+
+
+class StageProfile:
+    """
+    Where the time of a campaign went, stage by stage (claim, context,
+    render, mime, smtp, log_write, ...). Recording is one dict lookup and
+    one log() per timed operation, cheap enough for the per-recipient loop.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram()
+        histogram.add(seconds)
+
+    def merge(self, other):
+        for stage, histogram in other.stages.items():
+            self.stages.setdefault(stage, StageHistogram()).merge(histogram)
+
+    @contextmanager
+    def activate(self):
+        """Make this the profile stage() records into, in this thread/context."""
+        token = _current_profile.set(self)
+        try:
+            yield self
+        finally:
+            _current_profile.reset(token)
+
+    def to_dict(self):
+        return {"stages": {stage: h.to_dict() for stage, h in self.stages.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        for stage, histogram in (data or {}).get("stages", {}).items():
+            profile.stages[stage] = StageHistogram.from_dict(histogram)
+        return profile
+
+    def summary(self):
+        """Per stage totals and p50/p95/p99 (in ms), most expensive stage first."""
+        total = sum(h.total for h in self.stages.values())
+        stages = {}
+        for stage, h in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            stages[stage] = {
+                "count": h.count,
+                "total_seconds": round(h.total, 4),
+                "share": round(h.total / total, 4) if total else 0.0,
+                "mean_ms": round(h.total / h.count * 1000, 3) if h.count else 0.0,
+                "p50_ms": round(h.quantile(0.50) * 1000, 3),
+                "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                "p99_ms": round(h.quantile(0.99) * 1000, 3),
+                "max_ms": round(h.max * 1000, 3),
+            }
+        return {"total_seconds": round(total, 4), "stages": stages}
+
+
+@contextmanager
+def stage(name, observer=None):
+    """
+    Time a block as stage `name` of the active profile (if any), and
+    report it to a Prometheus `observer` (if given) as well.
+    """
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - started
+        if observer is not None:
+            observer.observe(elapsed)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.add(name, elapsed)
+
+
+def save_campaign_profile(campaign_id, profile):
+    """Merge one worker run's profile into Campaign.timing_profile."""
+    if not profile.stages:
+        return
+    with transaction.atomic():
+        # Workers of a campaign finish concurrently: merge under the row lock
+        campaign = Campaign.objects.select_for_update().only("id", "timing_profile").get(id=campaign_id)
+        merged = StageProfile.from_dict(campaign.timing_profile)
+        merged.merge(profile)
+        campaign.timing_profile = merged.to_dict()
+        campaign.save(update_fields=["timing_profile"])
@@ -0,0 +1,5 @@
+# Celery's autodiscover_tasks() imports `<app>.tasks`; re-export the
+# service-level tasks here so worker processes register them.
+from mailings.services.bulk_mail_service import send_bulk_mails, summarize_bulk_mails, abort_bulk_mails  # noqa: F401
+from mailings.services.attachment_store import collect_attachment_blobs  # noqa: F401
+from mailings.services.attachment_janitor import reclaim_orphaned_attachments  # noqa: F401
@@ -0,0 +1,633 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from client.models import Client
+from mailings.admin import SMTPRelayForm
+from mailings.models import Campaign, MailLog, SenderEmail, SMTPRelay
+from mailings.services.async_engine import get_async_engine
+from mailings.services.bulk_mail_service import send_bulk_mails, summarize_bulk_mails
+from mailings.services.campaign_recipients import (
+    claim_pending_logs,
+    create_pending_logs,
+    next_retry_at,
+    release_claims,
+)
+from mailings.services.email_sender import build_email_message, build_mime_parts
+from mailings.services.mail_log_buffer import MailLogBuffer
+from mailings.services.relay_router import RelayRouter
+from mailings.services.smtp_pool import PooledConnection
+from mailings.services.inline_image_cache import InlineImageCache
+from mailings.services.inline_image_service import InlineImageFetchError, load_inline_images
+from templates.models import EmailTemplate, InlineImage, MailType
+from users.models import User
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class AdminBulkMailInlineImageTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", role="ADMIN")
+        user = User.objects.create(username="client")
+        self.client_row = Client.objects.create(user=user, company_name="Acme", contact_email="client@example.com")
+        self.mail_type = MailType.objects.create(name="promo")
+        EmailTemplate.objects.create(
+            mail_type=self.mail_type,
+            subject="Hello",
+            template_name="promo",
+            template_content="<p>Hi {{ client_name }} <img src='cid:logo'></p>",
+        )
+        self.sender = SenderEmail.objects.create(name="Sender", email="sender@example.com")
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_inline_image_fetch_failure_returns_502(self):
+        error = InlineImageFetchError({"logo": "503 Service Unavailable"}, {"banner": b"png"})
+        with mock.patch("mailings.views.load_inline_images", side_effect=error), \
+                mock.patch("mailings.views.dispatch_bulk_mails") as dispatch:
+            response = self.api.post("/api/mailings/send-mail/", {
+                "client_id": str(self.client_row.id),
+                "mail_type_id": self.mail_type.id,
+                "sender_id": self.sender.id,
+            })
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.json(), {
+            "error": "Failed to load inline images",
+            "failed_images": {"logo": "503 Service Unavailable"},
+            "loaded_images": ["banner"],
+        })
+        dispatch.assert_not_called()
+        self.assertFalse(Campaign.objects.exists())
+
+
+class AttachmentPartTests(SimpleTestCase):
+    def message_parts(self, attachments):
+        email = build_email_message(
+            subject="Hello",
+            html_body="<p>Hi</p>",
+            from_email="sender@example.com",
+            to_email="client@example.com",
+            mime_parts=build_mime_parts(attachments=attachments),
+        )
+        message = message_from_bytes(email.message().as_bytes())
+        return [part for part in message.walk() if part.get_filename()]
+
+    def test_attachments_round_trip(self):
+        binary = bytes(range(256)) * 40
+        parts = self.message_parts([
+            {"filename": "report.pdf", "content": binary, "content_type": "application/pdf"},
+            {"filename": "notes.txt", "content": "héllo\n".encode(), "content_type": "text/plain"},
+            {"filename": "latin1.txt", "content": b"caf\xe9", "content_type": "text/plain"},
+            {"filename": "résumé.bin", "content": b"x"},
+        ])
+
+        self.assertEqual(
+            [(part.get_filename(), part.get_content_type()) for part in parts],
+            [
+                ("report.pdf", "application/pdf"),
+                ("notes.txt", "text/plain"),
+                ("latin1.txt", "application/octet-stream"),
+                ("résumé.bin", "application/octet-stream"),
+            ],
+        )
+        self.assertEqual(parts[0].get_payload(decode=True), binary)
+        self.assertEqual(parts[1].get_payload(decode=True).decode(parts[1].get_content_charset()), "héllo\n")
+        self.assertEqual(parts[2].get_payload(decode=True), b"caf\xe9")
+        self.assertTrue(all(part.get_content_disposition() == "attachment" for part in parts))
+
+
+def create_campaign(recipients):
+    """A queued campaign with `recipients` PENDING rows."""
+    mail_type = MailType.objects.create(name="newsletter")
+    template = EmailTemplate.objects.create(
+        mail_type=mail_type,
+        subject="News",
+        template_name="newsletter",
+        template_content="<p>Hi {{ client_name }}</p>",
+    )
+    sender = SenderEmail.objects.create(name="Sender", email="news@example.com")
+    users = User.objects.bulk_create([User(username=f"recipient-{i}") for i in range(recipients)])
+    clients = Client.objects.bulk_create([
+        Client(user=user, company_name="Acme", contact_email=f"recipient-{i}@example.com")
+        for i, user in enumerate(users)
+    ])
+    campaign = Campaign.objects.create(
+        name="News", mail_type=mail_type, template=template, sender=sender, subject="News",
+    )
+    total = create_pending_logs(
+        campaign.task_id,
+        [client.id for client in clients],
+        campaign=campaign,
+        mail_type=mail_type,
+        subject="News",
+    )
+    Campaign.objects.filter(id=campaign.id).update(total_count=total, pending_count=total)
+    return campaign
+
+
+def log_ids(campaign):
+    return list(MailLog.objects.filter(campaign=campaign).order_by("id").values_list("id", flat=True))
+
+
+def statuses(campaign):
+    return sorted(MailLog.objects.filter(campaign=campaign).values_list("status", flat=True))
+
+
+class ClaimPendingLogsTests(TestCase):
+    def setUp(self):
+        self.campaign = create_campaign(6)
+        self.ids = log_ids(self.campaign)
+
+    def test_claims_up_to_limit(self):
+        claimed = claim_pending_logs(self.campaign.task_id, limit=4, lease_seconds=900)
+
+        self.assertEqual(claimed, self.ids[:4])
+        self.assertEqual(statuses(self.campaign), ["PENDING"] * 2 + ["PROCESSING"] * 4)
+        self.assertEqual(claim_pending_logs(self.campaign.task_id, limit=4, lease_seconds=900), self.ids[4:])
+        self.assertEqual(claim_pending_logs(self.campaign.task_id, limit=4, lease_seconds=900), [])
+
+    def test_skips_rows_waiting_for_retry(self):
+        MailLog.objects.filter(id=self.ids[0]).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        MailLog.objects.filter(id=self.ids[1]).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim_pending_logs(self.campaign.task_id, limit=10, lease_seconds=900), self.ids[1:])
+
+    def test_reclaims_rows_after_lease_expiry(self):
+        now = timezone.now()
+        MailLog.objects.filter(id=self.ids[0]).update(status="PROCESSING", claimed_at=now - timedelta(seconds=901))
+        MailLog.objects.filter(id=self.ids[1]).update(status="PROCESSING", claimed_at=now - timedelta(seconds=10))
+        MailLog.objects.filter(id=self.ids[2]).update(status="SENT", claimed_at=now - timedelta(hours=1))
+
+        claimed = claim_pending_logs(self.campaign.task_id, limit=10, lease_seconds=900)
+
+        self.assertEqual(claimed, [self.ids[0], *self.ids[3:]])
+        self.assertGreater(MailLog.objects.get(id=self.ids[0]).claimed_at, now)
+
+    def test_release_claims(self):
+        claimed = claim_pending_logs(self.campaign.task_id, limit=3, lease_seconds=900)
+        MailLog.objects.filter(id=claimed[0]).update(status="SENT")
+        retry_at = timezone.now() + timedelta(minutes=1)
+
+        self.assertEqual(release_claims(claimed, retry_at=retry_at), 2)
+
+        released = MailLog.objects.filter(id__in=claimed[1:])
+        self.assertEqual({(log.status, log.claimed_at, log.next_attempt_at) for log in released},
+                         {("PENDING", None, retry_at)})
+        self.assertEqual(MailLog.objects.get(id=claimed[0]).status, "SENT")
+        self.assertEqual(claim_pending_logs(self.campaign.task_id, limit=10, lease_seconds=900), self.ids[3:])
+
+    def test_next_retry_at(self):
+        key = self.campaign.task_id
+        now = timezone.now()
+        self.assertLessEqual(next_retry_at(key, lease_seconds=900, poll_seconds=30), timezone.now())
+
+        retry_at = now + timedelta(minutes=5)
+        MailLog.objects.filter(id__in=self.ids).update(status="SENT")
+        MailLog.objects.filter(id=self.ids[0]).update(status="PENDING", next_attempt_at=retry_at)
+        self.assertEqual(next_retry_at(key, lease_seconds=900, poll_seconds=30), retry_at)
+
+        # Rows held by another run: checked again at the poll interval, or when their lease expires
+        MailLog.objects.filter(id=self.ids[1]).update(status="PROCESSING", claimed_at=now)
+        self.assertAlmostEqual(
+            next_retry_at(key, lease_seconds=900, poll_seconds=30), now + timedelta(seconds=30),
+            delta=timedelta(seconds=5),
+        )
+        self.assertEqual(next_retry_at(key, lease_seconds=10, poll_seconds=30), now + timedelta(seconds=10))
+
+        MailLog.objects.filter(id__in=self.ids[:2]).update(status="FAILED")
+        self.assertIsNone(next_retry_at(key, lease_seconds=900, poll_seconds=30))
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class ClaimSkipLockedTests(TransactionTestCase):
+    def test_skips_rows_locked_by_another_worker(self):
+        campaign = create_campaign(4)
+        ids = log_ids(campaign)
+        locked = threading.Event()
+        done = threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    list(MailLog.objects.select_for_update().filter(id__in=ids[:2]))
+                    locked.set()
+                    done.wait(10)
+            finally:
+                connection.close()
+
+        worker = threading.Thread(target=hold_lock)
+        worker.start()
+        try:
+            locked.wait(10)
+            claimed = claim_pending_logs(campaign.task_id, limit=10, lease_seconds=900)
+        finally:
+            done.set()
+            worker.join()
+
+        self.assertEqual(claimed, ids[2:])
+
+
+class MailLogBufferTests(TestCase):
+    def test_drops_outcomes_of_reclaimed_rows(self):
+        campaign = create_campaign(4)
+        claimed = claim_pending_logs(campaign.task_id, limit=4, lease_seconds=900)
+        claimed_at = MailLog.objects.get(id=claimed[0]).claimed_at
+        # The lease ran out and another worker took two of the rows over
+        MailLog.objects.filter(id__in=claimed[:2]).update(claimed_at=claimed_at + timedelta(seconds=1))
+        MailLog.objects.filter(id=claimed[2]).update(status="SENT")
+
+        buffer = MailLogBuffer(batch_size=10, campaign_id=campaign.id)
+        with buffer:
+            for log_id in claimed:
+                buffer.add(log_id, MailLog.StatusChoices.FAILED, "rejected", claimed_at=claimed_at)
+
+        self.assertEqual((buffer.written, buffer.dropped), (1, 3))
+        self.assertEqual(statuses(campaign), ["FAILED", "PROCESSING", "PROCESSING", "SENT"])
+        self.assertEqual(MailLog.objects.get(id=claimed[3]).error_message, "rejected")
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.failed_count, campaign.pending_count), (1, 3))
+
+
+class FakeRelayRouter:
+    """Accepts every message, records the envelopes."""
+
+    def __init__(self):
+        self.relay = SimpleNamespace(host="relay.test", name="relay.test", key="relay.test")
+        self.envelopes = []
+
+    def pick(self, exclude=()):
+        return self.relay
+
+    def send_messages(self, messages, relay=None):
+        self.envelopes.extend(message.recipients() for message in messages)
+        return [None] * len(messages)
+
+    def send_transactions(self, messages, relay=None):
+        self.envelopes.extend(message.recipients() for message in messages)
+        return [[None] * len(message.recipients()) for message in messages]
+
+
+@override_settings(BULK_MAIL_CLAIM_LEASE_SECONDS=1, BULK_MAIL_CLAIM_POLL_SECONDS=1)
+class SendBulkMailsResumeTests(TestCase):
+    def test_resumes_rows_claimed_by_a_crashed_run(self):
+        campaign = create_campaign(50)
+        # A run died holding a claim; its redelivered task starts right away
+        held = log_ids(campaign)[:20]
+        MailLog.objects.filter(id__in=held).update(status="PROCESSING", claimed_at=timezone.now())
+        router = FakeRelayRouter()
+
+        with mock.patch("mailings.services.bulk_mail_service.get_relay_router", return_value=router):
+            result = send_bulk_mails.apply(kwargs={"campaign_id": campaign.id}).get()
+        summary = summarize_bulk_mails([result], campaign.id)
+
+        self.assertEqual(result["sent"], 50)
+        self.assertEqual(sum(len(envelope) for envelope in router.envelopes), 50)
+        self.assertEqual(statuses(campaign), ["SENT"] * 50)
+        self.assertEqual((summary["sent"], summary["pending"]), (50, 0))
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count, campaign.pending_count), ("FINISHED", 50, 0))
+
+
+class SMTPRelayCredentialTests(TestCase):
+    def form_data(self, **overrides):
+        return {
+            "name": "Primary", "host": "smtp.example.com", "port": 587, "username": "mailer",
+            "password": "", "password_env": "", "use_tls": True, "weight": 1, "max_connections": 2,
+            "is_active": True, **overrides,
+        }
+
+    def test_admin_form_never_renders_the_password_and_keeps_it_when_blank(self):
+        relay = SMTPRelay.objects.create(name="Primary", host="smtp.example.com", password="s3cret")
+
+        self.assertNotIn("s3cret", SMTPRelayForm(instance=relay).as_p())
+        form = SMTPRelayForm(self.form_data(), instance=relay)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().password, "s3cret")
+
+        form = SMTPRelayForm(self.form_data(password="n3w"), instance=relay)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().password, "n3w")
+
+    def test_password_from_environment(self):
+        relay = SMTPRelay.objects.create(name="Primary", host="smtp.example.com", password="s3cret")
+        form = SMTPRelayForm(self.form_data(password_env="RELAY_TEST_PASSWORD"), instance=relay)
+        self.assertTrue(form.is_valid(), form.errors)
+        relay = form.save()
+        self.assertEqual(relay.password, "")
+
+        with mock.patch.dict(os.environ, {"RELAY_TEST_PASSWORD": "from-env"}):
+            router = RelayRouter()
+            [runtime] = router.relays()
+        self.assertEqual(runtime.pool.connection_kwargs["password"], "from-env")
+        self.assertEqual(runtime.async_kwargs["password"], "from-env")
+
+
+class AsyncEngineRelayHealthTests(SimpleTestCase):
+    def test_sends_feed_relay_health(self):
+        # A port nothing listens on: every session is refused
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        router = mock.Mock()
+        relay = SimpleNamespace(async_kwargs={"hostname": "127.0.0.1", "port": port, "start_tls": False})
+        email = build_email_message(
+            subject="Hello", html_body="<p>Hi</p>", from_email="sender@example.com", to_email="client@example.com",
+        )
+
+        with override_settings(EMAIL_ASYNC_CONCURRENCY=2), get_async_engine(relay, router) as engine:
+            for item in range(3):
+                engine.submit(item, email)
+            outcomes = engine.join()
+
+        self.assertEqual(len(outcomes), 3)
+        self.assertEqual(router.record.call_count, 3)
+        for (recorded_relay, elapsed, messages, [error]), _ in router.record.call_args_list:
+            self.assertIs(recorded_relay, relay)
+            self.assertEqual(messages, 1)
+            self.assertIsInstance(error, ConnectionError)
+
+
+class RecordingSMTP:
+    """Stands in for an open smtplib session without PIPELINING: keeps each sendmail()."""
+
+    def __init__(self):
+        self.transactions = []
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def has_extn(self, name):
+        return False
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        self.transactions.append((from_addr, to_addrs, msg))
+        return {}
+
+
+class MultiRecipientTransactionTests(TestCase):
+    def test_one_message_per_recipient_by_default(self):
+        campaign = create_campaign(4)
+        router = FakeRelayRouter()
+
+        with mock.patch("mailings.services.bulk_mail_service.get_relay_router", return_value=router):
+            send_bulk_mails.apply(kwargs={"campaign_id": campaign.id}).get()
+
+        self.assertEqual(sorted(router.envelopes), [[f"recipient-{i}@example.com"] for i in range(4)])
+
+    @override_settings(EMAIL_MAX_RCPT_PER_TRANSACTION=50)
+    def test_identical_bodies_share_a_transaction_when_enabled(self):
+        campaign = create_campaign(4)
+        Client.objects.update(company_name="Acme")
+        EmailTemplate.objects.update(template_content="<p>Hello from {{ company_name }}</p>")
+        router = FakeRelayRouter()
+
+        with mock.patch("mailings.services.bulk_mail_service.get_relay_router", return_value=router):
+            send_bulk_mails.apply(kwargs={"campaign_id": campaign.id}).get()
+
+        self.assertEqual(router.envelopes, [[f"recipient-{i}@example.com" for i in range(4)]])
+        self.assertEqual(statuses(campaign), ["SENT"] * 4)
+
+    def test_spliced_payload_reaches_every_envelope_recipient_without_naming_them(self):
+        recipients = [f"recipient-{i}@example.com" for i in range(3)]
+        content = bytes(range(256)) * 8
+        email = build_email_message(
+            subject="News",
+            html_body="<p>Hello from Acme</p>",
+            from_email="news@example.com",
+            to_email=None,
+            bcc=recipients,
+            mime_parts=build_mime_parts(attachments=[
+                {"filename": "report.pdf", "content": content, "content_type": "application/pdf"},
+            ]),
+        )
+        smtp = RecordingSMTP()
+
+        [errors] = PooledConnection(SimpleNamespace(connection=smtp, host="relay.test")).send_transactions([email])
+
+        self.assertEqual(errors, [None] * 3)
+        [(from_addr, to_addrs, payload)] = smtp.transactions
+        self.assertEqual(from_addr, "news@example.com")
+        self.assertEqual(to_addrs, recipients)
+        for recipient in recipients:
+            self.assertNotIn(recipient.encode(), payload)
+        message = message_from_bytes(payload)
+        self.assertEqual(message["To"], "undisclosed-recipients:;")
+        self.assertIsNone(message["Bcc"])
+        self.assertIsNone(message["Cc"])
+        [attachment] = [part for part in message.walk() if part.get_filename()]
+        self.assertEqual(attachment.get_payload(decode=True), content)
+
+
+class ImageServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the image CDN. /<name> serves b"image:<name>" after
+    `delay` seconds, except: /flaky-* fails with 503 on its first request,
+    /down-* always fails with 503, /missing-* is a 404.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), ImageHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.active = 0
+        self.max_active = 0
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        name = self.path.lstrip("/")
+        with server.lock:
+            server.requests[name] = seen = server.requests.get(name, 0) + 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if name.startswith("down-") or (name.startswith("flaky-") and seen == 1):
+                self.reply(503, b"busy")
+            elif name.startswith("missing-"):
+                self.reply(404, b"not found")
+            else:
+                self.reply(200, f"image:{name}".encode())
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def reply(self, code, body):
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(
+    INLINE_IMAGE_FETCH_WORKERS=4,
+    INLINE_IMAGE_FETCH_RETRIES=2,
+    INLINE_IMAGE_FETCH_BACKOFF_SECONDS=0.01,
+    INLINE_IMAGE_FETCH_TIMEOUT_SECONDS=5,
+)
+class InlineImageFetchTests(TestCase):
+    def setUp(self):
+        self.mail_type = MailType.objects.create(name="promo")
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_patch = mock.patch(
+            "mailings.services.inline_image_service.inline_images", InlineImageCache(cache_dir.name)
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def start_server(self, **kwargs):
+        server = ImageServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def add_images(self, *names):
+        return [
+            InlineImage.objects.create(
+                mail_type=self.mail_type, content_id=name, image=f"promo/{name}",
+                public_id=f"promo/{name}", display_order=order,
+            ).id
+            for order, name in enumerate(names)
+        ]
+
+    def load(self, server, ids):
+        return load_inline_images(image_ids=ids, url_for=lambda img: server.url(img.content_id))
+
+    def test_misses_are_downloaded_concurrently_then_cached(self):
+        server = self.start_server(delay=0.2)
+        ids = self.add_images("logo", "banner", "footer", "icon")
+
+        images = self.load(server, ids)
+
+        self.assertEqual(images, {name: (f"{name}.png", f"image:{name}".encode())
+                                  for name in ("logo", "banner", "footer", "icon")})
+        self.assertGreater(server.max_active, 1)
+        self.assertEqual(self.load(server, ids), images)
+        self.assertEqual(sum(server.requests.values()), 4)
+
+    def test_transient_errors_are_retried(self):
+        server = self.start_server()
+        ids = self.add_images("flaky-logo")
+
+        self.assertEqual(self.load(server, ids), {"flaky-logo": ("flaky-logo.png", b"image:flaky-logo")})
+        self.assertEqual(server.requests, {"flaky-logo": 2})
+
+    def test_partial_failure_lists_failed_and_loaded_images(self):
+        server = self.start_server()
+        ids = self.add_images("logo", "down-banner", "missing-footer")
+
+        with self.assertRaises(InlineImageFetchError) as raised:
+            self.load(server, ids)
+
+        error = raised.exception
+        self.assertEqual(set(error.failures), {"down-banner", "missing-footer"})
+        self.assertIn("503", error.failures["down-banner"])
+        self.assertIn("404", error.failures["missing-footer"])
+        self.assertEqual(error.images, {"logo": ("logo.png", b"image:logo")})
+        # 503 is retried until the retries run out, 404 is not
+        self.assertEqual(server.requests, {"logo": 1, "down-banner": 3, "missing-footer": 1})
+
+
+class SendBulkMailsMissingReferenceTests(TestCase):
+    def test_deleted_sender_fails_the_recipients(self):
+        campaign = create_campaign(3)
+        claim_pending_logs(campaign.task_id, limit=1, lease_seconds=900)
+        SenderEmail.objects.all().delete()
+
+        result = send_bulk_mails.apply(kwargs={"campaign_id": campaign.id}).get()
+        summary = summarize_bulk_mails([result], campaign.id)
+
+        self.assertEqual((result["sent"], result["failed"]), (0, 3))
+        self.assertEqual(
+            set(MailLog.objects.filter(campaign=campaign).values_list("status", "error_message")),
+            {("FAILED", "Campaign sender deleted before sending")},
+        )
+        self.assertEqual((summary["failed"], summary["pending"]), (3, 0))
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], REDIS_URL=None)
+class CampaignEventsAuthTests(TestCase):
+    def setUp(self):
+        self.campaign = create_campaign(1)
+        self.other = Campaign.objects.create(name="Other", mail_type=self.campaign.mail_type)
+        self.admin = User.objects.create(username="admin", role="ADMIN")
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.post(f"/api/mailings/campaigns/{self.campaign.id}/events/token/")
+        self.assertEqual(response.status_code, 200)
+        self.token = response.json()["token"]
+
+    async def open_stream(self, campaign, **kwargs):
+        response = await AsyncClient().get(f"/api/mailings/campaigns/{campaign.id}/events/", **kwargs)
+        if response.status_code == 200:
+            response.body = b"".join([chunk async for chunk in response.streaming_content])
+        return response
+
+    async def test_stream_token_opens_its_campaign_only(self):
+        response = await self.open_stream(self.campaign, data={"token": self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"event: progress", response.body)
+
+        response = await self.open_stream(self.other, data={"token": self.token})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_expired_stream_token_is_refused(self):
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 301):
+            response = await self.open_stream(self.campaign, data={"token": self.token})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_access_token_only_in_the_authorization_header(self):
+        access = str(await sync_to_async(AccessToken.for_user)(self.admin))
+
+        response = await self.open_stream(self.campaign, data={"token": access})
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.open_stream(self.campaign, headers={"Authorization": f"Bearer {access}"})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class MetricsEndpointTests(SimpleTestCase):
+    @override_settings(METRICS_AUTH_TOKEN="", METRICS_PUBLIC=False)
+    def test_disabled_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN="", METRICS_PUBLIC=True)
+    def test_public_only_when_opted_in(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN="scrape-token")
+    def test_bearer_token_required(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code, 401)
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"mail_messages_total", response.content)
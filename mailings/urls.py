@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     SenderEmailListCreateView, SenderEmailDetailView,
     MailLogListView, MailLogDetailView,
+    CampaignDetailView, CampaignTimingView, CampaignEventsTokenView, campaign_events_view,
     AdminBulkMailWithInlineImageAPIView,
     EmailPreviewAPIView
 )
@@ -17,6 +18,12 @@ urlpatterns = [
    path('logs/', MailLogListView.as_view(), name='log-list-create'),
    path('logs/<int:pk>/', MailLogDetailView.as_view(), name='log-detail'),
 
+   # Campaign progress
+   path('campaigns/<int:pk>/', CampaignDetailView.as_view(), name='campaign-detail'),
+   path('campaigns/<int:pk>/events/', campaign_events_view, name='campaign-events'),
+   path('campaigns/<int:pk>/events/token/', CampaignEventsTokenView.as_view(), name='campaign-events-token'),
+   path('campaigns/<int:pk>/timings/', CampaignTimingView.as_view(), name='campaign-timings'),
+
    # admin bulk mail send path
    path('send-mail/',AdminBulkMailWithInlineImageAPIView.as_view(),name='inline-image-mail'),
    path('preview/', EmailPreviewAPIView.as_view(), name='email-preview'),
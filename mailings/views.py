@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from client.models import Client
 from templates.models import MailType, EmailTemplate
-from mailings.models import MailLog, SenderEmail
+from mailings.models import Campaign, MailLog, SenderEmail
 from users.permissions import IsAdminUserRole
 
 from rest_framework import generics, permissions, status, filters
@@ -13,7 +13,9 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .serializers import (
     SenderEmailSerializer, 
     MailLogListSerializer, 
-    MailLogDetailSerializer
+    MailLogDetailSerializer,
+    CampaignStatusSerializer,
+    CampaignTimingSerializer
 )
 
 # --- 1. PAGINATION (Production Standard) ---
@@ -84,6 +86,28 @@ class MailLogDetailView(generics.RetrieveAPIView):
     serializer_class = MailLogDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+# --- 4. CAMPAIGN PROGRESS ---
+class CampaignDetailView(generics.RetrieveAPIView):
+    """
+    GET: Progress of a bulk mail campaign.
+
+    Served from the Campaign row's counters (one primary key lookup),
+    never from a count over MailLog, so polling it stays cheap whatever
+    the size of the campaign.
+    """
+    queryset = Campaign.objects.all()
+    serializer_class = CampaignStatusSerializer
+    permission_classes = [IsAuthenticated, IsAdminUserRole]
+
+class CampaignTimingView(generics.RetrieveAPIView):
+    """
+    GET: Where a campaign's sending time went: per-stage totals and
+    p50/p95/p99 (claim, context, render, mime, smtp, log_write, ...).
+    """
+    queryset = Campaign.objects.all()
+    serializer_class = CampaignTimingSerializer
+    permission_classes = [IsAuthenticated, IsAdminUserRole]
+
 
 # # bulk mail sending logic 
 
@@ -174,15 +198,18 @@ from rest_framework import status
 from .serializers import AdminBulkMailSerializer
 from .utils.parsers import parse_client_ids
 from mailings.services.attachment_service import save_attachments_to_disk
-from .services.inline_image_service import load_inline_images
-from .services.bulk_mail_service import send_bulk_mails
+from mailings.services.attachment_upload import AttachmentTooLarge, use_attachment_upload_handler
+from .services.inline_image_service import active_inline_images, load_inline_images, InlineImageFetchError
+from .services.bulk_mail_service import dispatch_bulk_mails
 
 
 class AdminBulkMailWithInlineImageAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUserRole]
 
     def post(self, request):
-        
+        # Attachments stream into the attachment store (hashed, size-capped) while the body is parsed
+        use_attachment_upload_handler(request)
+
         serializer = AdminBulkMailSerializer(
             data=request.data,
             context={"request": request}  # 🔥 REQUIRED
@@ -208,35 +235,57 @@ class AdminBulkMailWithInlineImageAPIView(APIView):
         if uploaded_files:
             try:
                 attachments = save_attachments_to_disk(uploaded_files)
+            except AttachmentTooLarge:
+                raise
             except Exception as e:
                 return Response(
                     {"error": f"Failed to process attachments: {str(e)}"},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
 
-        inline_images = load_inline_images(mail_type)
+        # Workers get the image versions by id; loading them here fills the
+        # inline image cache and rejects the campaign before it is queued
+        inline_image_ids = [
+            img.id for img in active_inline_images(mail_type) if img.image
+        ]
+        try:
+            load_inline_images(image_ids=inline_image_ids)
+        except InlineImageFetchError as e:
+            return Response(
+                {
+                    "error": "Failed to load inline images",
+                    "failed_images": e.failures,
+                    "loaded_images": list(e.images),
+                },
+                status=status.HTTP_502_BAD_GATEWAY
+            )
         
         # Get User ID from the authenticated request
         current_user_id = request.user.id
 
-        results = send_bulk_mails.delay(
+        # Fan the recipients out into chunked subtasks (Celery chord)
+        results = dispatch_bulk_mails(
             client_ids=list(clients.values_list("id", flat=True)),
             mail_type_id=mail_type.id,
             email_template_id=email_template.id,
             sender_id=sender.id,
             subject=subject,
             message=data.get("message", ""),
-            inline_images=inline_images,
+            inline_image_ids=inline_image_ids,
             attachments=attachments,
             # NEW ARGUMENTS:
             user_id=current_user_id,
             campaign_name=data.get('campaign_name', ''), # Optional: Add a field in serializer for this
-            dynamic_vars=dynamic_vars   # 🔥 NEW
+            dynamic_vars=dynamic_vars,   # 🔥 NEW
+            delivery_engine=data.get("delivery_engine", "pool"),
         )
 
+        campaign_id = Campaign.objects.values_list("id", flat=True).get(task_id=results.id)
+
         return Response({
             "success": True,
             "task_id": results.id,
+            "campaign_id": campaign_id,
             "message": "Uploads received. Emails are being processed.",
             "attachments_saved": len(attachments)
         })
@@ -264,7 +313,8 @@ class EmailPreviewAPIView(APIView):
         try:
             # 2. Fetch Objects with 'select_related' for Performance
             # This prevents a second DB query when accessing mail_type.template
-            client = get_object_or_404(Client, id=data['client_id'])
+            # client.user: the context's client_name is the username
+            client = get_object_or_404(Client.objects.select_related('user'), id=data['client_id'])
             
             mail_type = get_object_or_404(
                 MailType.objects.select_related('template'), 
@@ -282,10 +332,10 @@ class EmailPreviewAPIView(APIView):
             )
 
             # 4. We need to fetch active inline images for this mail_type
-            inline_images = InlineImage.objects.filter(
+            inline_images = list(InlineImage.objects.filter(
                 mail_type=mail_type, 
                 is_active=True
-            )
+            ).order_by('display_order'))
             
             # 5. Inject 'header' instead of just 'header'
             # This ensures preview_service.py can find and replace it with a URL
@@ -295,7 +345,7 @@ class EmailPreviewAPIView(APIView):
 
             # 6. Render HTML (CID -> URL conversion)
             try:
-                final_html = render_preview_html(mail_type.id, context)
+                final_html = render_preview_html(mail_type, context, inline_images)
             except Exception as e:
                 logger.error(f"Failed to render HTML for client {client.id}: {e}")
                 raise Exception("Failed to generate email content.")
@@ -318,4 +368,123 @@ class EmailPreviewAPIView(APIView):
             return Response(
                 {"error": str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+
+# --- CAMPAIGN PROGRESS STREAM (server-sent events, async: serve it over ASGI) ---
+import json
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .services.campaign_events import (
+    campaign_progress,
+    get_campaign_event_hub,
+    make_stream_token,
+    read_stream_token,
+)
+
+# Reconnect delay suggested to EventSource clients, in milliseconds
+SSE_RETRY_MS = 5000
+
+
+class CampaignEventsTokenView(APIView):
+    """
+    POST: A token opening the progress stream of one campaign from a
+    browser (EventSource cannot send the Authorization header):
+    /campaigns/<pk>/events/?token=<token>. It expires after
+    CAMPAIGN_EVENTS_TOKEN_SECONDS; the API access token never goes in a URL.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUserRole]
+
+    def post(self, request, pk):
+        campaign = get_object_or_404(Campaign, pk=pk)
+        return Response({
+            "token": make_stream_token(campaign.pk, request.user.pk),
+            "expires_in": settings.CAMPAIGN_EVENTS_TOKEN_SECONDS,
+        })
+
+
+async def authenticate_stream(request, campaign_id):
+    """
+    DRF does not run async views, so the caller is checked here: a JWT in
+    the Authorization header, or a stream token for this campaign in
+    ?token= (see CampaignEventsTokenView).
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header:
+        raw_token = auth.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            validated_token = auth.get_validated_token(raw_token)
+            return await sync_to_async(auth.get_user)(validated_token)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+
+    user_id = read_stream_token(request.GET.get('token', ''), campaign_id)
+    if user_id is None:
+        return None
+    return await get_user_model().objects.filter(pk=user_id, is_active=True).afirst()
+
+
+def sse_event(data, event="progress"):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def campaign_event_stream(campaign, hub):
+    queue = hub.subscribe(campaign.id) if hub is not None else None
+    try:
+        # Snapshot read after subscribing: nothing published in between is missed
+        await campaign.arefresh_from_db()
+        snapshot = campaign_progress(campaign)
+        yield f"retry: {SSE_RETRY_MS}\n" + sse_event(snapshot)
+        # Without Redis there are no live events: the client reconnects
+        # after SSE_RETRY_MS and gets a new snapshot
+        if queue is None or campaign.status in Campaign.FINAL_STATUSES:
+            return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.CAMPAIGN_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield sse_event(event)
+            if event.get("status") in Campaign.FINAL_STATUSES:
+                return
+    finally:
+        if queue is not None:
+            hub.unsubscribe(campaign.id, queue)
+
+
+@require_GET
+async def campaign_events_view(request, pk):
+    """
+    GET: Live progress of a campaign as server-sent events ("progress"
+    events with the fields of the campaign status API), until it finishes.
+
+    Events come from the workers through Redis pub/sub. Every stream of
+    this process shares one subscription (see CampaignEventHub), so open
+    dashboards cost no database queries after the initial snapshot.
+    """
+    user = await authenticate_stream(request, pk)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if user.role != 'ADMIN':
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+    campaign = await Campaign.objects.filter(pk=pk).afirst()
+    if campaign is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    return StreamingHttpResponse(
+        campaign_event_stream(campaign, get_campaign_event_hub()),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
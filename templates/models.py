@@ -48,12 +48,32 @@ class EmailTemplate(models.Model):
                 "Either template_content or template_name must be provided."
             )
 
+    def get_compiled_template(self):
+        """Compiled template_content, cached per (id, version) in this process."""
+        from django.template import Template
+        from .template_cache import compiled_templates
+
+        if self.pk is None:
+            return Template(self.template_content)
+        return compiled_templates.get(self.pk, self.version, self.template_content)
+
+    def get_referenced_variables(self):
+        """
+        Top-level context names template_content reads, or None when that
+        cannot be known (file-based template, {% include %}, ...).
+        """
+        from .template_variables import referenced_variables
+
+        if not self.template_content:
+            return None
+        return referenced_variables(self.get_compiled_template())
+
     def render_template(self, context_data):
-        from django.template import Template, Context
+        from django.template import Context
         from django.template.loader import render_to_string
 
         if self.template_content:
-            template = Template(self.template_content)
+            template = self.get_compiled_template()
             return template.render(Context(context_data))
 
         return render_to_string(self.template_name, context_data)
@@ -0,0 +1,74 @@
+# templates/template_cache.py
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template import Template
+
+
+class CompiledTemplateCache:
+    """
+    Process-local LRU of compiled Django templates keyed by
+    (EmailTemplate id, version), so a campaign lexes and parses its
+    HTML once instead of once per recipient.
+
+    The source text is kept next to the compiled template: if a row is
+    edited in place (e.g. from the admin) without a version bump, the
+    stale entry is recompiled instead of served.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_id, version, source):
+        key = (template_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == source:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        compiled = Template(source)
+
+        with self._lock:
+            self._entries[key] = (source, compiled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, template_id, version=None):
+        """Drop one version of a template, or every version when version is None."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == template_id and (version is None or key[1] == version):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+compiled_templates = CompiledTemplateCache(
+    max_entries=getattr(settings, 'TEMPLATE_CACHE_MAX_ENTRIES', 128)
+)
@@ -0,0 +1,70 @@
+# templates/template_variables.py
+
+from django.template.base import FilterExpression, Node, NodeList, Variable
+from django.template.defaulttags import DebugNode
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.template.smartif import TokenBase
+
+# Nodes whose output depends on context we cannot see from the template
+# itself: other templates loaded at render time, or the whole context
+OPAQUE_NODES = (ExtendsNode, IncludeNode, DebugNode)
+
+# Node attributes that never hold template expressions
+SKIPPED_ATTRIBUTES = {"token", "origin"}
+
+
+class OpaqueTemplate(Exception):
+    pass
+
+
+def referenced_variables(template):
+    """
+    Top-level context names a compiled django Template reads, e.g.
+    {"company_name", "message"} for "{{ company_name }}: {{ message|safe }}".
+
+    Returns None when this cannot be determined statically ({% include %},
+    {% extends %}, {% debug %}, tags that take the whole context): callers
+    must then assume the output depends on every context key.
+    """
+    names = set()
+    try:
+        _collect(template.nodelist, names, set())
+    except OpaqueTemplate:
+        return None
+    return names
+
+
+def _collect(obj, names, seen):
+    if isinstance(obj, FilterExpression):
+        _collect(obj.var, names, seen)
+        for _, args in obj.filters:
+            for lookup, arg in args:
+                if lookup:
+                    _collect(arg, names, seen)
+        return
+
+    if isinstance(obj, Variable):
+        if obj.lookups:
+            names.add(obj.lookups[0])
+        return
+
+    if isinstance(obj, (list, tuple, NodeList)):
+        for item in obj:
+            _collect(item, names, seen)
+        return
+
+    if isinstance(obj, dict):
+        for value in obj.values():
+            _collect(value, names, seen)
+        return
+
+    # Tag nodes and {% if %} condition trees: walk their attributes
+    if isinstance(obj, (Node, TokenBase)):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, OPAQUE_NODES) or getattr(obj, "takes_context", False):
+            raise OpaqueTemplate(type(obj).__name__)
+        for attribute, value in vars(obj).items():
+            if attribute not in SKIPPED_ATTRIBUTES:
+                _collect(value, names, seen)
@@ -60,6 +60,7 @@ from templates.models import InlineImage
 from django.http import HttpResponse
 from django.utils.html import escape
 from django.views.decorators.clickjacking import xframe_options_sameorigin
+from .template_cache import compiled_templates
 
 
 class EmailTemplateViewSet(ModelViewSet):
@@ -95,6 +96,9 @@ class EmailTemplateViewSet(ModelViewSet):
         old.is_active = False
         old.save(update_fields=['is_active'])
 
+        # The old version is never rendered again; free its compiled copy
+        compiled_templates.invalidate(old.pk, old.version)
+
 
     @action(detail=True, methods=['get'], url_path='preview')
     @xframe_options_sameorigin
@@ -144,6 +148,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from mailings.services.inline_image_cache import inline_images
 
 class InlineImageViewSet(ModelViewSet):
     queryset = InlineImage.objects.select_related('mail_type')
@@ -200,6 +205,9 @@ class InlineImageViewSet(ModelViewSet):
             old.is_active = False
             old.save(update_fields=['is_active'])
 
+            # The old version is never sent again: free its cached bytes
+            inline_images.invalidate(old.public_id or old.image.public_id)
+
             return
 
         # ✏️ CASE 2: METADATA-ONLY UPDATE (NO NEW VERSION)
@@ -220,6 +228,8 @@ class InlineImageViewSet(ModelViewSet):
     def perform_destroy(self, instance):
         instance.is_active = False
         instance.save(update_fields=['is_active'])
+        if instance.image:
+            inline_images.invalidate(instance.public_id or instance.image.public_id)
 
 
 